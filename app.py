@@ -11,12 +11,30 @@ import sys
 # Add sopgen to path
 sys.path.insert(0, os.path.dirname(__file__))
 
+# Only lightweight modules are imported eagerly; managers are imported by
+# their factory functions so pages that never use them skip the cost
 from sopgen.models import Document, Section
-from sopgen.templates import TemplateManager, StandardsManager
-from sopgen.generator import AIContentGenerator
-from sopgen.export import DocumentExporter
 from sopgen.utils import sanitize_filename, generate_doc_number
 
+# ==================== CONSTANTS ====================
+# Tuples of literals are folded into the compiled script's constants,
+# so reruns do not rebuild them
+_ROLES = ("doer", "reviewer", "approver", "admin")
+_APPROVER_ROLES = ("approver", "admin")
+_BASIC_SECTIONS = (
+    "Purpose", "Scope", "Definitions and Abbreviations",
+    "Responsibilities", "References", "Procedure",
+    "Safety Considerations", "Records"
+)
+# Export label -> (exporter format key, MIME type, file extension)
+_FORMAT_MAP = {
+    "DOCX (Word)": ("docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document", ".docx"),
+    "PDF": ("pdf", "application/pdf", ".pdf"),
+    "HTML": ("html", "text/html", ".html"),
+    "Markdown": ("markdown", "text/markdown", ".md"),
+    "Excel (Tables)": ("excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx")
+}
+
 # ==================== PAGE CONFIGURATION ====================
 st.set_page_config(
     page_title="SOP-gen: AI Document Generator",
@@ -26,7 +44,9 @@ st.set_page_config(
 )
 
 # ==================== CUSTOM CSS ====================
-st.markdown("""
+# Streamlit clears elements that are not re-emitted, so the styles are
+# written on every rerun from a single constant
+_CUSTOM_CSS = """
     <style>
     .main-header {
         font-size: 2.5rem;
@@ -69,6 +89,16 @@ st.markdown("""
         border-radius: 5px;
         margin: 10px 0;
     }
+    .template-grid {
+        display: flex;
+        flex-wrap: wrap;
+        gap: 10px;
+    }
+    .template-card {
+        flex: 1 1 calc(25% - 10px);
+        min-width: 180px;
+        padding: 8px 0;
+    }
     .stButton>button {
         background-color: #FF6B35;
         color: white;
@@ -81,23 +111,265 @@ st.markdown("""
         border: 2px solid #004E89;
     }
     </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(_CUSTOM_CSS, unsafe_allow_html=True)
+
+# ==================== SHARED RESOURCES ====================
+# Stateless managers are built once per process and shared across sessions
+@st.cache_resource
+def get_ai_generator():
+    from sopgen.generator import AIContentGenerator
+    return AIContentGenerator()
+
+
+@st.cache_resource
+def get_template_manager():
+    from sopgen.templates import TemplateManager
+    return TemplateManager()
+
+
+@st.cache_resource
+def get_standards_manager():
+    from sopgen.templates import StandardsManager
+    return StandardsManager()
+
+
+@st.cache_resource
+def get_exporter():
+    from sopgen.export import DocumentExporter
+    return DocumentExporter()
+
+
+# ==================== CACHED LOOKUPS ====================
+# Template lookups go straight to TemplateManager, which caches by file
+# mtime so saved and edited templates show up on the next rerun.
+# Leading underscore keeps Streamlit from hashing the manager argument
+@st.cache_data(ttl=24 * 60 * 60)
+def _cached_all_standards(_sm) -> dict:
+    return _sm.get_all_standards()
+
+
+@st.cache_data(ttl=24 * 60 * 60)
+def _cached_standard_ids(_sm) -> tuple:
+    return tuple(_sm.get_all_standards().keys())
+
+
+@st.cache_data
+def _home_template_cards(names: tuple) -> str:
+    """Single prerendered HTML block for the Home page template showcase"""
+    cards = "".join(
+        f'<div class="template-card"><b>{name.replace("_", " ").title()}</b></div>'
+        for name in names
+    )
+    return f'<div class="template-grid">{cards}</div>'
+
+
+@st.cache_data(ttl=24 * 60 * 60)
+def _grouped_standards(query: str) -> dict:
+    """Standards matching query (all when empty), grouped by category"""
+    sm = get_standards_manager()
+    source = sm.search_standards(query) if query else sm.get_all_standards()
+    categories = {}
+    for std_id, std_data in source.items():
+        categories.setdefault(std_data['category'], []).append((std_id, std_data))
+    return categories
+
+
+def get_template_metadata_index(tm) -> dict:
+    """Lightweight {name: {standard, section_count}} index for the library grid"""
+    index = {}
+    for template_name in tm.list_templates():
+        info = tm.get_template_info(template_name)
+        if info:
+            index[template_name] = {
+                'standard': info['standard'],
+                'section_count': info['section_count']
+            }
+    return index
+
+
+# ==================== DOCUMENT RENDERING ====================
+def _doc_signature(doc) -> tuple:
+    """Cheap hashable key covering everything the exporters render"""
+    return (
+        doc.title,
+        doc.doc_number,
+        doc.created_by,
+        doc.created_at.isoformat(),
+        tuple((key, str(value)) for key, value in doc.metadata.items()),
+        tuple((sec.title, sec.content, sec.content_type) for sec in doc.sections)
+    )
+
+
+@st.cache_data(max_entries=16)
+def _cached_preview(sig: tuple, _exporter, _doc) -> str:
+    return _exporter.to_markdown(_doc)
+
+
+@st.cache_data(max_entries=8, ttl=3600)
+def _cached_export(sig: tuple, format_key: str, _exporter, _doc) -> bytes:
+    return _exporter.export_document(_doc, format_key)
+
+
+# ==================== WIDGET CALLBACKS ====================
+_SECTION_WIDGET_PREFIXES = ("title_", "content_", "std_")
+_HISTORY_PAGE_SIZE = 10
+
+
+def _sync_standards(doc, widget_key: str) -> None:
+    """Write the standards multiselect back into the document metadata"""
+    doc.metadata['standards'] = list(st.session_state[widget_key])
+
+
+def _write_title(section, widget_key: str) -> None:
+    """Write an edited section title back to the Section"""
+    section.title = st.session_state[widget_key]
+
+
+def _write_content(section, widget_key: str) -> None:
+    """Write edited section content back to the Section"""
+    section.content = st.session_state[widget_key]
+
+
+def _add_section(doc) -> None:
+    """Append a placeholder section"""
+    doc.add_section(f"New Section {len(doc.sections) + 1}")
+
+
+def _clear_section(section, content_key: str) -> None:
+    """Empty a section and its editor widget"""
+    section.content = ""
+    section.ai_generated = False
+    st.session_state[content_key] = ""
+
+
+def _approve_document(doc) -> None:
+    """Approve and lock the document as the current user"""
+    doc.approve(st.session_state.current_user)
+
+
+def _unlock_document(doc) -> None:
+    """Reopen an approved document for editing"""
+    doc.approved = False
+    for sec in doc.sections:
+        sec.locked = False
+
+
+def _set_current_document(doc) -> None:
+    """Replace the current document, dropping editor and history-paging state"""
+    st.session_state.current_doc = doc
+    st.session_state.pop("history_limit", None)
+    _reset_section_widgets()
 
-# ==================== SESSION STATE INITIALIZATION ====================
-if 'current_doc' not in st.session_state:
-    st.session_state.current_doc = None
 
-if 'ai_generator' not in st.session_state:
-    st.session_state.ai_generator = AIContentGenerator()
+def _load_library_template(template_name: str) -> None:
+    """Make a library template the current document"""
+    _set_current_document(get_template_manager().load_template(template_name))
 
-if 'template_manager' not in st.session_state:
-    st.session_state.template_manager = TemplateManager()
 
-if 'standards_manager' not in st.session_state:
-    st.session_state.standards_manager = StandardsManager()
+def _clear_current_document() -> None:
+    """Discard the current document"""
+    _set_current_document(None)
 
-if 'exporter' not in st.session_state:
-    st.session_state.exporter = DocumentExporter()
+
+def _show_more_history() -> None:
+    """Reveal the next page of version history"""
+    st.session_state.history_limit += _HISTORY_PAGE_SIZE
+
+
+def _reset_section_widgets() -> None:
+    """Drop editor widget state after sections are added, removed or replaced
+
+    Clears the standards multiselect too, so a replaced document reseeds it
+    from its own metadata instead of showing the previous selection.
+    """
+    for key in [k for k in st.session_state if str(k).startswith(_SECTION_WIDGET_PREFIXES)]:
+        del st.session_state[key]
+
+
+# ==================== SECTION EDITOR ====================
+@st.fragment
+def _render_section(doc, section, idx: int) -> None:
+    """Render one section editor; widget interaction reruns only this fragment"""
+    title_key = f"title_{idx}"
+    content_key = f"content_{idx}"
+
+    # Seed widget state from the Section; afterwards edits flow back through callbacks
+    if title_key not in st.session_state:
+        st.session_state[title_key] = section.title
+    if content_key not in st.session_state:
+        st.session_state[content_key] = section.content
+
+    with st.expander(f"📄 {section.title}" + (" ✅" if section.content.strip() else " ⚪"), expanded=not section.content.strip()):
+
+        # Section controls
+        col_a, col_b, col_c, col_d = st.columns([3, 1, 1, 1])
+
+        with col_a:
+            # Allow editing section title
+            st.text_input(
+                f"Section Title",
+                key=title_key,
+                label_visibility="collapsed",
+                on_change=_write_title,
+                args=(section, title_key)
+            )
+
+        with col_b:
+            if st.button("🤖 Generate", key=f"gen_{idx}", help="Generate content with AI"):
+                with st.spinner(f"Generating {section.title}..."):
+                    try:
+                        # Render chunks as they arrive instead of waiting for the full section
+                        generated_content = st.write_stream(
+                            get_ai_generator().generate_section_content_stream(doc, section)
+                        ).strip()
+                        section.content = generated_content
+                        section.ai_generated = True
+                        st.session_state[content_key] = generated_content
+                        doc.log_version(
+                            user=st.session_state.current_user,
+                            role=st.session_state.current_role,
+                            changes=f"AI generated content for {section.title}"
+                        )
+                        # Only this section's header and editor need refreshing
+                        st.rerun(scope="fragment")
+                    except Exception as e:
+                        st.error(f"Error: {e}")
+
+        with col_c:
+            st.button(
+                "🗑️ Clear",
+                key=f"clear_{idx}",
+                help="Clear content",
+                on_click=_clear_section,
+                args=(section, content_key)
+            )
+
+        with col_d:
+            if st.button("❌ Remove", key=f"remove_{idx}", help="Remove section"):
+                doc.remove_section(section.title)
+                _reset_section_widgets()
+                st.rerun()
+
+        # Content editing
+        st.text_area(
+            f"Content for {section.title}",
+            height=200,
+            key=content_key,
+            label_visibility="collapsed",
+            on_change=_write_content,
+            args=(section, content_key)
+        )
+
+        # Show if AI-generated
+        if section.ai_generated:
+            st.caption("🤖 AI-Generated (you can edit)")
+
+
+# ==================== SESSION STATE INITIALIZATION ====================
+if 'current_doc' not in st.session_state:
+    st.session_state.current_doc = None
 
 if 'current_user' not in st.session_state:
     st.session_state.current_user = "User"
@@ -125,15 +397,15 @@ with st.sidebar:
     st.session_state.current_user = st.text_input("Your Name", value=st.session_state.current_user)
     st.session_state.current_role = st.selectbox(
         "Your Role",
-        ["doer", "reviewer", "approver", "admin"],
-        index=["doer", "reviewer", "approver", "admin"].index(st.session_state.current_role)
+        _ROLES,
+        index=_ROLES.index(st.session_state.current_role)
     )
 
     st.markdown("---")
 
     # AI Status
     st.markdown("### 🤖 AI Status")
-    if st.session_state.ai_generator.use_mock:
+    if get_ai_generator().use_mock:
         st.warning("⚠️ Running in Demo Mode\n\nAdd API keys for real AI generation")
     else:
         st.success("✅ AI Models Active")
@@ -144,7 +416,7 @@ with st.sidebar:
     if st.session_state.current_doc:
         st.markdown("### 📊 Current Document")
         st.info(f"**Sections:** {len(st.session_state.current_doc.sections)}")
-        filled = sum(1 for s in st.session_state.current_doc.sections if s.content.strip())
+        filled = st.session_state.current_doc.filled_section_count()
         st.info(f"**Filled:** {filled}/{len(st.session_state.current_doc.sections)}")
 
 # ==================== HOME PAGE ====================
@@ -207,15 +479,16 @@ if page == "🏠 Home":
 
     # Available templates showcase
     st.markdown("### 📚 Available Templates")
-    templates = st.session_state.template_manager.list_templates()
-
-    template_cols = st.columns(4)
-    for idx, template in enumerate(templates):
-        with template_cols[idx % 4]:
-            st.markdown(f"**{template.replace('_', ' ').title()}**")
+    templates = get_template_manager().list_templates()
+    st.markdown(_home_template_cards(tuple(templates)), unsafe_allow_html=True)
 
 # ==================== CREATE SOP PAGE ====================
 elif page == "📄 Create SOP":
+    template_manager = get_template_manager()
+    standards_manager = get_standards_manager()
+    ai_generator = get_ai_generator()
+    exporter = get_exporter()
+
     st.markdown('<p class="main-header">📄 Create New SOP</p>', unsafe_allow_html=True)
 
     # Step 1: Template Selection
@@ -230,7 +503,7 @@ elif page == "📄 Create SOP":
     selected_template_name = None
 
     if template_option == "📚 Use Template Library":
-        templates = st.session_state.template_manager.list_templates()
+        templates = template_manager.list_templates()
 
         col1, col2 = st.columns([3, 1])
 
@@ -245,8 +518,8 @@ elif page == "📄 Create SOP":
             st.markdown("<br>", unsafe_allow_html=True)
             if st.button("📋 Load Template", use_container_width=True):
                 try:
-                    doc = st.session_state.template_manager.load_template(selected_template_name)
-                    st.session_state.current_doc = doc
+                    doc = template_manager.load_template(selected_template_name)
+                    _set_current_document(doc)
                     st.success(f"✅ Template '{selected_template_name}' loaded successfully!")
                     st.rerun()
                 except Exception as e:
@@ -255,7 +528,7 @@ elif page == "📄 Create SOP":
         # Show template preview
         if selected_template_name:
             with st.expander("👀 Preview Template Structure"):
-                info = st.session_state.template_manager.get_template_info(selected_template_name)
+                info = template_manager.get_template_info(selected_template_name)
                 if info:
                     st.write(f"**Standard:** {info['standard']}")
                     st.write(f"**Description:** {info['description']}")
@@ -279,15 +552,10 @@ elif page == "📄 Create SOP":
                         created_by=st.session_state.current_user
                     )
                     # Add basic sections
-                    basic_sections = [
-                        "Purpose", "Scope", "Definitions and Abbreviations",
-                        "Responsibilities", "References", "Procedure",
-                        "Safety Considerations", "Records"
-                    ]
-                    for idx, section_title in enumerate(basic_sections):
+                    for idx, section_title in enumerate(_BASIC_SECTIONS):
                         doc.add_section(section_title, order=idx)
 
-                    st.session_state.current_doc = doc
+                    _set_current_document(doc)
                     st.success(f"✅ New document created: {new_doc_title}")
                     st.rerun()
                 else:
@@ -322,14 +590,19 @@ elif page == "📄 Create SOP":
             effective_date = st.date_input("Effective Date", value=datetime.now())
             doc.metadata['effective_date'] = effective_date.strftime('%Y-%m-%d')
 
-            # Standards selection
-            all_standards = list(st.session_state.standards_manager.get_all_standards().keys())
-            selected_standards = st.multiselect(
+            # Standards selection (widget state is bound by key and only
+            # written back to the document when the selection changes)
+            standards_key = f"std_{doc.doc_number}"
+            if standards_key not in st.session_state:
+                current = doc.metadata.get('standards')
+                st.session_state[standards_key] = current if isinstance(current, list) else []
+            st.multiselect(
                 "Applicable Standards",
-                all_standards,
-                default=doc.metadata.get('standards', []) if isinstance(doc.metadata.get('standards'), list) else []
+                _cached_standard_ids(standards_manager),
+                key=standards_key,
+                on_change=_sync_standards,
+                args=(doc, standards_key)
             )
-            doc.metadata['standards'] = selected_standards
 
         # Step 3: Section Editing
         st.markdown("---")
@@ -341,74 +614,11 @@ elif page == "📄 Create SOP":
         col_left, col_right = st.columns([1, 4])
 
         with col_left:
-            if st.button("➕ Add Section"):
-                new_section_title = f"New Section {len(doc.sections) + 1}"
-                doc.add_section(new_section_title)
-                st.rerun()
+            st.button("➕ Add Section", on_click=_add_section, args=(doc,))
 
-        # Iterate through sections
+        # Iterate through sections (each editor is an isolated fragment)
         for idx, section in enumerate(doc.sections):
-            with st.expander(f"📄 {section.title}" + (" ✅" if section.content.strip() else " ⚪"), expanded=not section.content.strip()):
-
-                # Section controls
-                col_a, col_b, col_c, col_d = st.columns([3, 1, 1, 1])
-
-                with col_a:
-                    # Allow editing section title
-                    new_title = st.text_input(
-                        f"Section Title",
-                        value=section.title,
-                        key=f"title_{idx}",
-                        label_visibility="collapsed"
-                    )
-                    if new_title != section.title:
-                        section.title = new_title
-
-                with col_b:
-                    if st.button("🤖 Generate", key=f"gen_{idx}", help="Generate content with AI"):
-                        with st.spinner(f"Generating {section.title}..."):
-                            try:
-                                generated_content = st.session_state.ai_generator.generate_section_content(
-                                    doc, section
-                                )
-                                section.content = generated_content
-                                section.ai_generated = True
-                                doc.log_version(
-                                    user=st.session_state.current_user,
-                                    role=st.session_state.current_role,
-                                    changes=f"AI generated content for {section.title}"
-                                )
-                                st.rerun()
-                            except Exception as e:
-                                st.error(f"Error: {e}")
-
-                with col_c:
-                    if st.button("🗑️ Clear", key=f"clear_{idx}", help="Clear content"):
-                        section.content = ""
-                        section.ai_generated = False
-                        st.rerun()
-
-                with col_d:
-                    if st.button("❌ Remove", key=f"remove_{idx}", help="Remove section"):
-                        doc.remove_section(section.title)
-                        st.rerun()
-
-                # Content editing
-                section_content = st.text_area(
-                    f"Content for {section.title}",
-                    value=section.content,
-                    height=200,
-                    key=f"content_{idx}",
-                    label_visibility="collapsed"
-                )
-
-                # Update content if changed
-                if section_content != section.content:
-                    section.content = section_content
-
-                # Show if AI-generated
-                if section.ai_generated:
-                    st.caption("🤖 AI-Generated (you can edit)")
+            _render_section(doc, section, idx)
 
         # Step 4: Preview and Export
         st.markdown("---")
@@ -420,7 +630,7 @@ elif page == "📄 Create SOP":
             st.markdown("### Document Preview")
 
             # Generate markdown preview
-            preview_md = st.session_state.exporter.to_markdown(doc)
+            preview_md = _cached_preview(_doc_signature(doc), exporter, doc)
             st.markdown(preview_md)
 
         with tab_export:
@@ -434,41 +644,40 @@ elif page == "📄 Create SOP":
                 # Export format selection
                 export_format = st.radio(
                     "Select format:",
-                    ["DOCX (Word)", "PDF", "HTML", "Markdown", "Excel (Tables)"],
+                    tuple(_FORMAT_MAP),
                     horizontal=False
                 )
 
+                format_key, mime_type, extension = _FORMAT_MAP[export_format]
+                export_key = (format_key, _doc_signature(doc))
+                export_cache = st.session_state.setdefault("export_cache", {})
+
                 # Export button
                 if st.button("📥 Generate Download", use_container_width=True, type="primary"):
                     try:
-                        format_map = {
-                            "DOCX (Word)": ("docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document", ".docx"),
-                            "PDF": ("pdf", "application/pdf", ".pdf"),
-                            "HTML": ("html", "text/html", ".html"),
-                            "Markdown": ("markdown", "text/markdown", ".md"),
-                            "Excel (Tables)": ("excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx")
-                        }
-
-                        format_key, mime_type, extension = format_map[export_format]
-
                         with st.spinner(f"Generating {export_format}..."):
-                            export_bytes = st.session_state.exporter.export_document(doc, format_key)
+                            export_bytes = _cached_export(export_key[1], format_key, exporter, doc)
 
-                            filename = sanitize_filename(f"{doc.doc_number}_{doc.title}{extension}")
+                        # Keep only exports of the current document state
+                        for key in [k for k in export_cache if k[1] != export_key[1]]:
+                            del export_cache[key]
+                        export_cache[export_key] = export_bytes
 
-                            st.download_button(
-                                label=f"⬇️ Download {export_format}",
-                                data=export_bytes,
-                                file_name=filename,
-                                mime=mime_type,
-                                use_container_width=True
-                            )
-
-                            st.success(f"✅ {export_format} ready for download!")
+                        st.success(f"✅ {export_format} ready for download!")
 
                     except Exception as e:
                         st.error(f"❌ Export error: {e}")
 
+                # Rendered outside the button branch so it survives later reruns
+                if export_key in export_cache:
+                    st.download_button(
+                        label=f"⬇️ Download {export_format}",
+                        data=export_cache[export_key],
+                        file_name=sanitize_filename(f"{doc.doc_number}_{doc.title}{extension}"),
+                        mime=mime_type,
+                        use_container_width=True
+                    )
+
             with col_exp2:
                 st.markdown("#### 💾 Save Document")
 
@@ -482,88 +691,96 @@ elif page == "📄 Create SOP":
                 st.markdown("---")
 
                 # Approval workflow
-                if st.session_state.current_role in ["approver", "admin"]:
+                if st.session_state.current_role in _APPROVER_ROLES:
                     st.markdown("#### ✔️ Approval")
 
                     if not doc.approved:
-                        if st.button("✅ Approve & Lock Document", use_container_width=True):
-                            doc.approve(st.session_state.current_user)
-                            st.success(f"✅ Document approved by {st.session_state.current_user}")
-                            st.rerun()
+                        st.button(
+                            "✅ Approve & Lock Document",
+                            use_container_width=True,
+                            on_click=_approve_document,
+                            args=(doc,)
+                        )
                     else:
                         st.info(f"✅ Approved by: {doc.approver}")
 
                         if st.session_state.current_role == "admin":
-                            if st.button("🔓 Unlock for Editing"):
-                                doc.approved = False
-                                for sec in doc.sections:
-                                    sec.locked = False
-                                st.success("Document unlocked")
-                                st.rerun()
+                            st.button("🔓 Unlock for Editing", on_click=_unlock_document, args=(doc,))
 
         with tab_version:
             st.markdown("### Version History")
 
             if doc.versions:
-                for version in reversed(doc.versions):
+                # Only the most recent versions are rendered; older ones load on demand
+                shown = st.session_state.setdefault("history_limit", _HISTORY_PAGE_SIZE)
+                for version in doc.versions[-shown:][::-1]:
                     with st.expander(f"Version {version.version_id} - {version.timestamp.strftime('%Y-%m-%d %H:%M:%S')}"):
                         st.write(f"**User:** {version.user} ({version.role})")
                         st.write(f"**Changes:** {version.changes}")
                         st.write(f"**Sections:** {len(version.content_snapshot)}")
+
+                if len(doc.versions) > shown:
+                    st.button(
+                        f"Load more ({len(doc.versions) - shown} older)",
+                        on_click=_show_more_history
+                    )
             else:
                 st.info("No version history yet")
 
 # ==================== TEMPLATE LIBRARY PAGE ====================
 elif page == "📚 Template Library":
+    template_manager = get_template_manager()
+
     st.markdown('<p class="main-header">📚 Template Library</p>', unsafe_allow_html=True)
 
-    templates = st.session_state.template_manager.list_templates()
+    template_index = get_template_metadata_index(template_manager)
 
-    st.markdown(f"### Available Templates ({len(templates)})")
+    st.markdown(f"### Available Templates ({len(template_index)})")
 
     # Display templates in grid
     cols = st.columns(3)
 
-    for idx, template_name in enumerate(templates):
+    for idx, (template_name, meta) in enumerate(template_index.items()):
         with cols[idx % 3]:
-            info = st.session_state.template_manager.get_template_info(template_name)
+            st.markdown(f"""
+            <div class="section-box">
+            <h4>{template_name.replace('_', ' ').title()}</h4>
+            <p><b>Standard:</b> {meta['standard']}</p>
+            <p><b>Sections:</b> {meta['section_count']}</p>
+            </div>
+            """, unsafe_allow_html=True)
+
+            # Expander bodies run on every rerun whether open or not, so the
+            # full section list sits behind a toggle and is only fetched
+            # while the toggle is on
+            if st.toggle("👀 Show sections", key=f"preview_{template_name}"):
+                info = template_manager.get_template_info(template_name)
+                if info:
+                    for section in info['sections']:
+                        st.write(f"  • {section}")
 
-            if info:
-                st.markdown(f"""
-                <div class="section-box">
-                <h4>{template_name.replace('_', ' ').title()}</h4>
-                <p><b>Standard:</b> {info['standard']}</p>
-                <p><b>Sections:</b> {info['section_count']}</p>
-                </div>
-                """, unsafe_allow_html=True)
-
-                if st.button(f"Load {template_name}", key=f"load_{template_name}"):
-                    doc = st.session_state.template_manager.load_template(template_name)
-                    st.session_state.current_doc = doc
-                    st.success(f"✅ Loaded {template_name}")
-                    st.rerun()
+            st.button(
+                f"Load {template_name}",
+                key=f"load_{template_name}",
+                on_click=_load_library_template,
+                args=(template_name,)
+            )
 
 # ==================== STANDARDS REFERENCE PAGE ====================
 elif page == "📖 Standards Reference":
+    standards_manager = get_standards_manager()
+
     st.markdown('<p class="main-header">📖 Standards Reference</p>', unsafe_allow_html=True)
 
-    standards = st.session_state.standards_manager.get_all_standards()
+    standards = _cached_all_standards(standards_manager)
 
     st.markdown(f"### Available Standards ({len(standards)})")
 
     # Search
     search_query = st.text_input("🔍 Search standards", placeholder="e.g., IEC, ISO, Solar PV")
 
-    if search_query:
-        standards = st.session_state.standards_manager.search_standards(search_query)
-
-    # Group by category
-    categories = {}
-    for std_id, std_data in standards.items():
-        category = std_data['category']
-        if category not in categories:
-            categories[category] = []
-        categories[category].append((std_id, std_data))
+    # Group by category (cached per query)
+    categories = _grouped_standards(search_query)
 
     # Display by category
     for category, stds in categories.items():
@@ -624,15 +841,12 @@ elif page == "⚙️ Settings":
 
     st.write(f"**Current User:** {st.session_state.current_user}")
     st.write(f"**Current Role:** {st.session_state.current_role}")
-    st.write(f"**AI Mode:** {'Demo/Mock' if st.session_state.ai_generator.use_mock else 'Production'}")
-    st.write(f"**Templates Available:** {len(st.session_state.template_manager.list_templates())}")
-    st.write(f"**Standards Database:** {len(st.session_state.standards_manager.get_all_standards())} standards")
+    st.write(f"**AI Mode:** {'Demo/Mock' if get_ai_generator().use_mock else 'Production'}")
+    st.write(f"**Templates Available:** {len(get_template_manager().list_templates())}")
+    st.write(f"**Standards Database:** {len(_cached_all_standards(get_standards_manager()))} standards")
 
     st.markdown("---")
 
     st.markdown("## 🔄 Reset")
 
-    if st.button("🔄 Clear Current Document"):
-        st.session_state.current_doc = None
-        st.success("✅ Current document cleared")
-        st.rerun()
+    st.button("🔄 Clear Current Document", on_click=_clear_current_document)
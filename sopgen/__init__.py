@@ -3,13 +3,26 @@ SOP-gen: AI-Powered SOP Document Generator
 A modular system for generating and managing Standard Operating Procedures
 """
 
+import importlib
+
 __version__ = "1.0.0"
 __author__ = "Ganesh Gowri"
 
-from .models import Document, Section, DocumentVersion
-from .templates import TemplateManager, StandardsManager
-from .generator import AIContentGenerator
-from .export import DocumentExporter
+# Public names are resolved on first access so that importing a light module
+# (e.g. sopgen.models) does not pull in the generator and exporter stacks
+_LAZY_EXPORTS = {
+    'Document': '.models',
+    'Section': '.models',
+    'DocumentVersion': '.models',
+    'TemplateManager': '.templates',
+    'StandardsManager': '.templates',
+    'AIContentGenerator': '.generator',
+    'DocumentExporter': '.export',
+    'LLMCache': '.cache',
+    'SemanticCache': '.cache',
+    'GenCache': '.cache',
+    'BatchProcessor': '.batch',
+}
 
 __all__ = [
     'Document',
@@ -18,5 +31,22 @@ __all__ = [
     'TemplateManager',
     'StandardsManager',
     'AIContentGenerator',
-    'DocumentExporter'
+    'DocumentExporter',
+    'LLMCache',
+    'SemanticCache',
+    'GenCache',
+    'BatchProcessor'
 ]
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,252 @@
+"""
+Batch Generation
+Submits a document's sections through the OpenAI Batch and Anthropic Message
+Batches APIs for non-interactive generation at reduced cost
+"""
+
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .models import Document, Section
+from . import generator as gen
+
+# Batch statuses after which no more results will arrive
+_OPENAI_DONE = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchProcessor:
+    """
+    Generates document sections through the providers' batch endpoints
+
+    Batch jobs are billed at roughly half the interactive price but may take
+    minutes to hours to finish, so this is meant for back-office generation,
+    not the editor. Sections routed to mock mode or already in the
+    generator's caches are answered without being submitted.
+    """
+
+    def __init__(
+        self,
+        generator: 'gen.AIContentGenerator',
+        poll_interval: float = 30.0,
+        timeout: float = 24 * 3600
+    ):
+        """
+        Args:
+            generator: Supplies prompts, routing, caches and sampling settings
+            poll_interval: Seconds between batch status checks
+            timeout: Give up waiting after this many seconds
+        """
+        self.generator = generator
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+    def run(
+        self,
+        document: Document,
+        additional_context: str = "",
+        sections: Optional[List[Section]] = None
+    ) -> Tuple[List[str], Dict[int, str]]:
+        """
+        Generate content for the sections via batch jobs
+
+        Returns:
+            (contents, failures): content strings in the same order as the
+            sections, with an error placeholder for each section that failed,
+            and the failure reason keyed by section index
+        """
+        if sections is None:
+            sections = document.sections
+
+        results: List[Optional[str]] = [None] * len(sections)
+        # custom_id -> (index, model_name, prompt, cache_key, cache_scope)
+        pending: Dict[str, Dict[str, tuple]] = {"openai": {}, "anthropic": {}}
+
+        plan = self.generator.plan_generation(document, additional_context, sections)
+        for model_key, jobs in plan.items():
+            provider = self.generator.model_config[model_key]["provider"]
+            model_name = self.generator.model_config[model_key]["model_name"]
+            for index, section, prompt in jobs:
+                if provider == "mock":
+                    results[index] = self.generator._generate_mock_content(section.title, document.title)
+                    continue
+
+                cache_scope = (section.title, document.title)
+                cache_key, cached = self.generator._lookup_cached(model_name, gen.SYSTEM_PROMPT, prompt, cache_scope)
+                if cached is not None:
+                    results[index] = cached
+                    continue
+
+                # Anthropic only accepts [A-Za-z0-9_-] ids, and titles can repeat
+                pending[provider][f"section-{index}"] = (index, model_name, prompt, cache_key, cache_scope)
+
+        completed: Dict[str, str] = {}
+        errors: Dict[str, str] = {}
+        if pending["openai"]:
+            batch_completed, batch_errors = self._run_openai(pending["openai"])
+            completed.update(batch_completed)
+            errors.update(batch_errors)
+        if pending["anthropic"]:
+            batch_completed, batch_errors = self._run_anthropic(pending["anthropic"])
+            completed.update(batch_completed)
+            errors.update(batch_errors)
+
+        failures: Dict[int, str] = {}
+        for jobs in pending.values():
+            for custom_id, (index, model_name, prompt, cache_key, cache_scope) in jobs.items():
+                content = completed.get(custom_id)
+                if content is None:
+                    failures[index] = errors.get(custom_id, "no result returned")
+                    results[index] = self.generator._generate_mock_content("Error", "Batch request failed")
+                else:
+                    self.generator._store_cached(cache_key, model_name, prompt, cache_scope, content)
+                    results[index] = content
+
+        return results, failures
+
+    def _wait(self, is_done) -> bool:
+        """Poll until is_done() is true; False on timeout"""
+        deadline = time.monotonic() + self.timeout
+        while not is_done():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll_interval)
+        return True
+
+    @staticmethod
+    def _cancel(cancel, batch_id: str, reason: str) -> str:
+        """Cancel a remote batch so it stops running (and billing); returns the failure reason"""
+        try:
+            cancel(batch_id)
+        except Exception as e:
+            return f"{reason}; cancelling batch {batch_id} failed: {e}"
+        return f"{reason}; batch {batch_id} cancelled"
+
+    def _run_openai(self, jobs: Dict[str, Tuple]) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """
+        Submit one JSONL batch to OpenAI
+
+        Returns:
+            (content, errors), both keyed by custom_id
+        """
+        batch = None
+        try:
+            client = self.generator._openai_client()
+            jsonl = "\n".join(
+                json.dumps({
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": model_name,
+                        "messages": [
+                            {"role": "system", "content": gen.SYSTEM_PROMPT},
+                            {"role": "user", "content": prompt}
+                        ],
+                        "temperature": self.generator.temperature,
+                        "max_tokens": gen.MAX_OUTPUT_TOKENS
+                    }
+                })
+                for custom_id, (_, model_name, prompt, _, _) in jobs.items()
+            )
+
+            batch_file = client.files.create(file=("sections.jsonl", jsonl.encode("utf-8")), purpose="batch")
+            batch = client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+
+            def is_done() -> bool:
+                nonlocal batch
+                batch = client.batches.retrieve(batch.id)
+                return batch.status in _OPENAI_DONE
+
+            if not self._wait(is_done):
+                reason = self._cancel(
+                    client.batches.cancel, batch.id,
+                    f"OpenAI batch timed out after {self.timeout:g}s"
+                )
+                return {}, dict.fromkeys(jobs, reason)
+
+            # Successful requests land in the output file and failed ones in
+            # the error file; a batch that failed as a whole has neither
+            result_files = [f for f in (batch.output_file_id, batch.error_file_id) if f]
+            if not result_files:
+                return {}, dict.fromkeys(jobs, f"OpenAI batch {batch.id} ended with status {batch.status}")
+
+            completed, errors = {}, {}
+            for file_id in result_files:
+                for line in client.files.content(file_id).text.splitlines():
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    response = record.get("response") or {}
+                    if response.get("status_code") == 200:
+                        message = response["body"]["choices"][0]["message"]["content"]
+                        completed[record["custom_id"]] = message.strip()
+                    else:
+                        error = record.get("error") or (response.get("body") or {}).get("error") or {}
+                        errors[record["custom_id"]] = (
+                            f"OpenAI request failed ({response.get('status_code') or error.get('code')}): "
+                            f"{error.get('message', 'unknown error')}"
+                        )
+            return completed, errors
+
+        except Exception as e:
+            reason = f"OpenAI batch API error: {e}"
+            if batch is not None and getattr(batch, "status", None) not in _OPENAI_DONE:
+                reason = self._cancel(client.batches.cancel, batch.id, reason)
+            return {}, dict.fromkeys(jobs, reason)
+
+    def _run_anthropic(self, jobs: Dict[str, Tuple]) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """
+        Submit one message batch to Anthropic
+
+        Returns:
+            (content, errors), both keyed by custom_id
+        """
+        batch = None
+        try:
+            client = self.generator._anthropic_client()
+            batch = client.messages.batches.create(requests=[
+                {
+                    "custom_id": custom_id,
+                    "params": {
+                        "model": model_name,
+                        "max_tokens": gen.MAX_OUTPUT_TOKENS,
+                        "temperature": self.generator.temperature,
+                        "system": gen.ANTHROPIC_SYSTEM,
+                        "messages": [{"role": "user", "content": prompt}]
+                    }
+                }
+                for custom_id, (_, model_name, prompt, _, _) in jobs.items()
+            ])
+
+            def is_done() -> bool:
+                nonlocal batch
+                batch = client.messages.batches.retrieve(batch.id)
+                return batch.processing_status == "ended"
+
+            if not self._wait(is_done):
+                reason = self._cancel(
+                    client.messages.batches.cancel, batch.id,
+                    f"Anthropic batch timed out after {self.timeout:g}s"
+                )
+                return {}, dict.fromkeys(jobs, reason)
+
+            completed, errors = {}, {}
+            for entry in client.messages.batches.results(batch.id):
+                if entry.result.type == "succeeded":
+                    completed[entry.custom_id] = entry.result.message.content[0].text.strip()
+                else:
+                    error = getattr(entry.result, "error", None)
+                    detail = getattr(getattr(error, "error", None), "message", None) or entry.result.type
+                    errors[entry.custom_id] = f"Anthropic request {entry.result.type}: {detail}"
+            return completed, errors
+
+        except Exception as e:
+            reason = f"Anthropic batch API error: {e}"
+            if batch is not None and getattr(batch, "processing_status", None) != "ended":
+                reason = self._cancel(client.messages.batches.cancel, batch.id, reason)
+            return {}, dict.fromkeys(jobs, reason)
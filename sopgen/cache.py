@@ -0,0 +1,223 @@
+"""
+LLM Response Caching
+Exact-match, template and semantic caches for generated section content
+"""
+
+import functools
+import hashlib
+import json
+import math
+import operator
+import os
+import re
+from typing import Any, Callable, Dict, FrozenSet, List, MutableMapping, Optional, Sequence, Tuple
+
+# Placeholders standing in for the document title inside GenCache skeletons
+_TOPIC_SLOT = "\x00topic\x00"
+_TOPIC_LOWER_SLOT = "\x00topic_lower\x00"
+
+# Titles shorter than this, or of a single word, are too likely to occur as
+# ordinary words in the response ("Test" in "tested", "Solar" in "solar
+# inverters") to be slotted safely, so GenCache skips them
+_MIN_TOPIC_LENGTH = 8
+
+
+class LLMCache:
+    """
+    Exact-match cache for LLM completions
+
+    Keys are SHA-256 digests of the full request (model, system prompt,
+    user prompt, sampling parameters), so only byte-identical requests hit.
+    The backend is any mapping: a plain dict by default, or a persistent
+    store such as diskcache.Cache("data/llm_cache") if one is passed in.
+    """
+
+    def __init__(self, backend: Optional[MutableMapping] = None):
+        self.backend = backend if backend is not None else {}
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def make_key(**request: Any) -> str:
+        """Build a cache key from the request parameters"""
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached completion, or None on a miss"""
+        value = self.backend.get(key)
+        if value is None:
+            self.stats["misses"] += 1
+        else:
+            self.stats["hits"] += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        """Store a completion"""
+        self.backend[key] = value
+
+    def clear(self) -> None:
+        """Remove all cached completions and reset the counters"""
+        self.backend.clear()
+        self.stats = {"hits": 0, "misses": 0}
+
+
+@functools.lru_cache(maxsize=256)
+def _topic_pattern(topic: str) -> re.Pattern:
+    """Regex matching the title only where it isn't part of a longer word"""
+    return re.compile(r'(?<!\w)' + re.escape(topic) + r'(?!\w)')
+
+
+class GenCache:
+    """
+    Response skeletons reused across SOPs with the same section structure
+
+    Section prompts differ between SOPs mainly in the document title. The
+    first response for a section is stored with every occurrence of the
+    title replaced by a slot; a later request whose prompt is identical apart
+    from the title is answered by filling the new title into that skeleton.
+
+    The key is the prompt with the title slotted out, so any change to the
+    template, context or standards is a miss. Responses that never mention
+    the title aren't stored (they can't be told apart from topic-specific
+    text), nor are sections listed in bypass_sections, nor titles that are a
+    single word or very short, since those also occur as ordinary words.
+    """
+
+    def __init__(self, bypass_sections: FrozenSet[str] = frozenset({"Normative References"})):
+        """
+        Args:
+            bypass_sections: Section titles whose content is always topic-specific
+        """
+        self.bypass_sections = bypass_sections
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+        self._skeletons: Dict[str, str] = {}
+
+    @staticmethod
+    def _slottable(topic: str) -> bool:
+        """True if the title is distinctive enough to slot without hitting ordinary words"""
+        topic = topic.strip()
+        return len(topic) >= _MIN_TOPIC_LENGTH and len(topic.split()) > 1
+
+    @staticmethod
+    def _slot_topic(text: str, topic: str) -> str:
+        """Replace whole-word occurrences of the title (and its lowercase form) with slots"""
+        text = _topic_pattern(topic).sub(_TOPIC_SLOT, text)
+        lower = topic.lower()
+        if lower != topic:
+            text = _topic_pattern(lower).sub(_TOPIC_LOWER_SLOT, text)
+        return text
+
+    def _key(self, model_name: str, section_title: str, prompt: str, topic: str) -> Optional[str]:
+        if section_title in self.bypass_sections or not self._slottable(topic):
+            return None
+        return LLMCache.make_key(
+            model=model_name,
+            section=section_title,
+            prompt=self._slot_topic(prompt, topic)
+        )
+
+    def get(self, model_name: str, section_title: str, prompt: str, topic: str) -> Optional[str]:
+        """Return the stored skeleton rendered for this topic, or None"""
+        key = self._key(model_name, section_title, prompt, topic)
+        skeleton = self._skeletons.get(key) if key else None
+        if skeleton is None:
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        return skeleton.replace(_TOPIC_SLOT, topic).replace(_TOPIC_LOWER_SLOT, topic.lower())
+
+    def set(self, model_name: str, section_title: str, prompt: str, topic: str, response: str) -> None:
+        """Store a response as a skeleton if it references the topic"""
+        key = self._key(model_name, section_title, prompt, topic)
+        if key is None or key in self._skeletons:
+            return
+        skeleton = self._slot_topic(response, topic)
+        if skeleton != response:
+            self._skeletons[key] = skeleton
+
+    def clear(self) -> None:
+        """Remove all skeletons and reset the counters"""
+        self._skeletons.clear()
+        self.stats = {"hits": 0, "misses": 0}
+
+
+class SemanticCache:
+    """
+    Similarity cache for prompts that differ only in wording
+
+    Prompts are embedded and compared by cosine similarity against earlier
+    prompts in the same bucket (the generator buckets by model and section
+    title, so a "Scope" prompt can never answer a "Safety" one). A stored
+    response is reused when the best match reaches the threshold.
+
+    Matches are approximate by design; keep the threshold high, and only
+    enable this where near-duplicate SOPs are expected.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[str], Sequence[float]],
+        threshold: float = 0.92,
+        max_entries_per_bucket: int = 256
+    ):
+        """
+        Args:
+            embed_fn: Returns an embedding vector for a text
+            threshold: Minimum cosine similarity for a hit
+            max_entries_per_bucket: Oldest entries are dropped beyond this
+        """
+        self.threshold = threshold
+        self.max_entries_per_bucket = max_entries_per_bucket
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+        self._buckets: Dict[str, List[Tuple[List[float], str]]] = {}
+        self._embed_fn = embed_fn
+        # Embeddings are API calls too, so repeats of a prompt are memoized
+        self._embed = functools.lru_cache(maxsize=1024)(self._embed_normalized)
+
+    @classmethod
+    def with_openai_embeddings(cls, model: str = "text-embedding-3-small", **kwargs) -> 'SemanticCache':
+        """Create a semantic cache backed by the OpenAI embeddings endpoint"""
+        import openai
+
+        client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY", ""))
+
+        def embed(text: str) -> Sequence[float]:
+            return client.embeddings.create(model=model, input=text).data[0].embedding
+
+        return cls(embed, **kwargs)
+
+    def _embed_normalized(self, text: str) -> List[float]:
+        """Unit-length embedding, so a dot product is the cosine similarity"""
+        vector = list(self._embed_fn(text))
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    def get(self, bucket: str, prompt: str) -> Optional[str]:
+        """Return the response of the most similar cached prompt, or None"""
+        entries = self._buckets.get(bucket)
+        if entries:
+            query = self._embed(prompt)
+            best_score, best_response = max(
+                ((sum(map(operator.mul, query, vector)), response) for vector, response in entries),
+                key=operator.itemgetter(0)
+            )
+            if best_score >= self.threshold:
+                self.stats["hits"] += 1
+                return best_response
+
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, bucket: str, prompt: str, response: str) -> None:
+        """Store a response under its prompt embedding"""
+        entries = self._buckets.setdefault(bucket, [])
+        entries.append((self._embed(prompt), response))
+        if len(entries) > self.max_entries_per_bucket:
+            del entries[0]
+
+    def clear(self) -> None:
+        """Remove all cached responses and reset the counters"""
+        self._buckets.clear()
+        self._embed.cache_clear()
+        self.stats = {"hits": 0, "misses": 0}
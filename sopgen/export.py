@@ -3,16 +3,265 @@ Document Export Module
 Handles export to multiple formats: DOCX, PDF, HTML, Excel
 """
 
+import csv
+import functools
+import importlib
 import io
 import os
-from typing import Optional
+import re
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
 from datetime import datetime
 from .models import Document, Section
 
+try:
+    import markdown2
+except ImportError as e:
+    raise ImportError(
+        "markdown2 is required for document export; install it with "
+        "'pip install markdown2'"
+    ) from e
+
+# markdown2 extras used for HTML rendering (tuple so it can live at module scope)
+_MARKDOWN_EXTRAS = ("tables", "fenced-code-blocks", "break-on-newline")
+
+# HTML escaping as a single str.translate pass (same entities as html.escape)
+_HTML_ESCAPE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&#x27;',
+})
+
+# Page shell for HTML export; only the title and rendered body vary per call
+_HTML_SHELL = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>%(title)s</title>
+    <style>
+        body {
+            font-family: Arial, Helvetica, sans-serif;
+            line-height: 1.6;
+            max-width: 900px;
+            margin: 40px auto;
+            padding: 20px;
+            color: #333;
+        }
+        h1 {
+            color: #2c3e50;
+            border-bottom: 3px solid #3498db;
+            padding-bottom: 10px;
+        }
+        h2 {
+            color: #34495e;
+            margin-top: 30px;
+            border-bottom: 2px solid #bdc3c7;
+            padding-bottom: 5px;
+        }
+        h3 {
+            color: #555;
+        }
+        table {
+            border-collapse: collapse;
+            width: 100%%;
+            margin: 20px 0;
+        }
+        table, th, td {
+            border: 1px solid #ddd;
+        }
+        th {
+            background-color: #3498db;
+            color: white;
+            padding: 12px;
+            text-align: left;
+        }
+        td {
+            padding: 10px;
+        }
+        tr:nth-child(even) {
+            background-color: #f2f2f2;
+        }
+        code {
+            background-color: #f4f4f4;
+            padding: 2px 5px;
+            border-radius: 3px;
+        }
+        pre {
+            background-color: #f4f4f4;
+            padding: 15px;
+            border-radius: 5px;
+            overflow-x: auto;
+        }
+        .metadata {
+            background-color: #ecf0f1;
+            padding: 15px;
+            border-radius: 5px;
+            margin-bottom: 20px;
+        }
+        .footer {
+            margin-top: 40px;
+            padding-top: 20px;
+            border-top: 1px solid #bdc3c7;
+            font-size: 0.9em;
+            color: #7f8c8d;
+        }
+    </style>
+</head>
+<body>
+    %(body)s
+</body>
+</html>"""
+
+# Splits a Markdown table row into cells, swallowing the padding around pipes
+_MD_CELL_SPLIT_RE = re.compile(r'\s*\|\s*')
+
+
+def _split_md_row(line: str) -> list:
+    """Cells of one stripped Markdown table row, outer pipes dropped"""
+    return _MD_CELL_SPLIT_RE.split(line.strip('|').strip())
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_table(content: str) -> tuple:
+    """
+    Parse a table section (Markdown pipe table or CSV)
+
+    Memoized on the content string, so exporting the same document to
+    several formats parses each table once, and an edited section simply
+    misses the cache. Results are shared, hence tuples.
+
+    Returns:
+        (headers, data_rows); both empty when the content has no cells
+    """
+    lines = list(filter(None, (line.strip() for line in content.splitlines())))
+
+    if not lines:
+        return (), ()
+
+    if lines[0].startswith('|'):
+        # Markdown table; skip header and separator
+        headers = _split_md_row(lines[0])
+        data_rows = [_split_md_row(line) for line in lines[2:] if line.startswith('|')]
+    else:
+        # CSV; csv.reader keeps quoted commas inside their cell
+        stripped = ([c.strip() for c in row] for row in csv.reader(io.StringIO(content)))
+        rows = [cells for cells in stripped if any(cells)]
+        if not rows:
+            # Only delimiters, e.g. ",,"
+            return (), ()
+        headers, data_rows = rows[0], rows[1:]
+
+    return tuple(headers), tuple(tuple(row) for row in data_rows)
+
+
+# Saved DOCX files stay in memory up to this size, larger ones spill to disk
+_DOCX_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+@functools.lru_cache(maxsize=None)
+def _optional_module(name: str):
+    """
+    Import an optional export backend once per process
+
+    Returns:
+        The module, or None if it (or a native library it needs) is missing.
+        Misses are cached too, so absent backends aren't searched for again
+        on every export.
+    """
+    try:
+        return importlib.import_module(name)
+    except (ImportError, OSError):
+        return None
+
+
+@functools.lru_cache(maxsize=128)
+def _render_markdown(md_text: str) -> str:
+    """Render Markdown to HTML, memoized on the exact Markdown text"""
+    return markdown2.markdown(md_text, extras=list(_MARKDOWN_EXTRAS))
+
+
+# Media formats that are already compressed; deflating them again only burns CPU
+_PRECOMPRESSED_MEDIA = ('.png', '.jpg', '.jpeg', '.gif')
+
+
+# PackageWriter steps that OpcPackage.save runs, in order, against a zip writer
+_DOCX_PACKAGE_STEPS = ('_write_content_types_stream', '_write_pkg_rels', '_write_parts')
+
+
+class _DocxZipWriter:
+    """Zip writer for python-docx's PackageWriter: stores compressed images, fast-deflates XML"""
+
+    def __init__(self, stream):
+        self._zipf = zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1)
+
+    def write(self, pack_uri, blob: bytes):
+        name = pack_uri.membername
+        if name.startswith('word/media/') and name.lower().endswith(_PRECOMPRESSED_MEDIA):
+            self._zipf.writestr(name, blob, compress_type=zipfile.ZIP_STORED)
+        else:
+            self._zipf.writestr(name, blob)
+
+    def close(self):
+        self._zipf.close()
+
+
+def _save_docx(word_doc, stream) -> None:
+    """
+    Save a python-docx Document to stream through _DocxZipWriter
+
+    Mirrors OpcPackage.save, but hands PackageWriter's steps a writer
+    instance of our own instead of the module's default zip writer, so
+    nothing global is changed. python-docx has no public hook for this;
+    if the steps used here have moved in a newer release, the document is
+    saved normally with its default compression.
+    """
+    package_writer = getattr(_optional_module('docx.opc.pkgwriter'), 'PackageWriter', None)
+    steps = [getattr(package_writer, name, None) for name in _DOCX_PACKAGE_STEPS]
+    package = getattr(getattr(word_doc, 'part', None), 'package', None)
+    if package is None or None in steps:
+        word_doc.save(stream)
+        return
+
+    for part in package.parts:
+        part.before_marshal()
+
+    write_content_types, write_pkg_rels, write_parts = steps
+    writer = _DocxZipWriter(stream)
+    try:
+        write_content_types(writer, package.parts)
+        write_pkg_rels(writer, package.rels)
+        write_parts(writer, package.parts)
+    finally:
+        writer.close()
+
+
+# Markdown body for each section content type
+_MD_SECTION_RENDERERS = {
+    "text": lambda sec: sec.content,
+    "image": lambda sec: f"![{sec.title}]({sec.content})",
+    "table": lambda sec: sec.content,
+    "flowchart": lambda sec: f"```mermaid\n{sec.content}\n```",
+    "latex": lambda sec: f"$$\n{sec.content}\n$$",
+}
+
+
+def _export_one(job: tuple) -> bytes:
+    """Process-pool worker for DocumentExporter.export_documents"""
+    exporter, document, format = job
+    return exporter.export_document(document, format)
+
 
 class DocumentExporter:
     """Handles document export to various formats"""
 
+    # weasyprint renders in-process; pdfkit spawns a wkhtmltopdf process
+    # per document, so it is only tried first when this is turned off
+    prefer_weasyprint = True
+
     def __init__(self):
         self.supported_formats = ['docx', 'pdf', 'html', 'excel', 'markdown']
 
@@ -42,287 +291,232 @@ class DocumentExporter:
         else:
             raise ValueError(f"Unsupported format: {format}")
 
+    def export_documents(self, documents: List[Document], format: str = 'docx',
+                         max_workers: Optional[int] = None) -> List[bytes]:
+        """
+        Export several documents to the same format in parallel
+
+        Args:
+            documents: Documents to export
+            format: Output format (docx, pdf, html, excel, markdown)
+            max_workers: Worker process count (defaults to CPU count)
+
+        Returns:
+            Exported bytes, in the same order as documents
+        """
+        # Export is CPU-bound, so worker processes rather than threads;
+        # a single document isn't worth the pool start-up
+        if len(documents) <= 1:
+            return [self.export_document(d, format) for d in documents]
+
+        # The exporter travels with each job so instance settings such as
+        # prefer_weasyprint apply in the workers too
+        jobs = [(self, d, format) for d in documents]
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(_export_one, jobs))
+
     def to_markdown(self, doc: Document) -> str:
         """Convert document to Markdown format"""
-        md_lines = []
+        return self._markdown_body(doc) + "\n" + self._markdown_footer(doc)
+
+    def _markdown_body(self, doc: Document) -> str:
+        """Title, metadata and sections; depends only on document content"""
+        # Each block after the title carries its own leading separator, so the
+        # buffer is written once instead of collecting fragments for a join
+        buf = io.StringIO()
+        w = buf.write
 
         # Title
-        md_lines.append(f"# {doc.title}\n")
+        w(f"# {doc.title}\n")
 
         # Document metadata
         if doc.doc_number:
-            md_lines.append(f"**Document Number:** {doc.doc_number}\n")
+            w(f"\n**Document Number:** {doc.doc_number}\n")
 
         if doc.metadata:
             if doc.metadata.get('company'):
-                md_lines.append(f"**Company:** {doc.metadata['company']}\n")
+                w(f"\n**Company:** {doc.metadata['company']}\n")
             if doc.metadata.get('revision'):
-                md_lines.append(f"**Revision:** {doc.metadata['revision']}\n")
+                w(f"\n**Revision:** {doc.metadata['revision']}\n")
             if doc.metadata.get('effective_date'):
-                md_lines.append(f"**Effective Date:** {doc.metadata['effective_date']}\n")
+                w(f"\n**Effective Date:** {doc.metadata['effective_date']}\n")
 
-        md_lines.append("\n---\n\n")
+        w("\n\n---\n\n")
 
         # Sections
         for sec in doc.sections:
-            if not sec.content or not sec.content.strip():
+            if not sec.content or sec.content.isspace():
                 continue
 
-            # Section heading
-            md_lines.append(f"## {sec.title}\n")
-
-            # Section content based on type
-            if sec.content_type == "text":
-                md_lines.append(sec.content)
-            elif sec.content_type == "image":
-                md_lines.append(f"![{sec.title}]({sec.content})")
-            elif sec.content_type == "table":
-                md_lines.append(sec.content)
-            elif sec.content_type == "flowchart":
-                md_lines.append(f"```mermaid\n{sec.content}\n```")
-            elif sec.content_type == "latex":
-                md_lines.append(f"$$\n{sec.content}\n$$")
-
-            md_lines.append("\n\n")
-
-        # Footer
-        md_lines.append("---\n")
-        md_lines.append(f"\n*Document generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n")
-        if doc.created_by:
-            md_lines.append(f"*Created by: {doc.created_by}*\n")
+            # Section content based on type; unknown types emit the heading only
+            render = _MD_SECTION_RENDERERS.get(sec.content_type)
+            body = render(sec) if render else None
 
-        return "\n".join(md_lines)
+            # Heading, content and trailing blank lines in one write
+            if body is None:
+                w(f"\n## {sec.title}\n\n\n\n")
+            else:
+                w(f"\n## {sec.title}\n\n{body}\n\n\n")
+
+        return buf.getvalue()
+
+    def _markdown_footer(self, doc: Document) -> str:
+        """Generation timestamp and author line"""
+        generated_on = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        footer = f"---\n\n\n*Document generated on {generated_on}*\n"
+        if doc.created_by:
+            footer += f"\n*Created by: {doc.created_by}*\n"
+        return footer
 
     def to_html(self, doc: Document) -> str:
         """Convert document to HTML format"""
-        # Convert markdown to HTML first
-        md_text = self.to_markdown(doc)
+        # Convert markdown to HTML first. The body is rendered separately from
+        # the timestamped footer so unchanged documents hit the render cache
+        md_body = self._markdown_body(doc)
+        md_footer = self._markdown_footer(doc)
 
-        # Basic markdown to HTML conversion (you can use markdown2 library for better conversion)
-        try:
-            import markdown2
-            html_body = markdown2.markdown(
-                md_text,
-                extras=["tables", "fenced-code-blocks", "break-on-newline"]
-            )
-        except ImportError:
-            # Fallback if markdown2 not available
-            html_body = md_text.replace('\n', '<br>\n')
+        html_body = _render_markdown(md_body) + "\n" + _render_markdown(md_footer)
 
         # Wrap in HTML template
-        html = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>{doc.title}</title>
-    <style>
-        body {{
-            font-family: Arial, Helvetica, sans-serif;
-            line-height: 1.6;
-            max-width: 900px;
-            margin: 40px auto;
-            padding: 20px;
-            color: #333;
-        }}
-        h1 {{
-            color: #2c3e50;
-            border-bottom: 3px solid #3498db;
-            padding-bottom: 10px;
-        }}
-        h2 {{
-            color: #34495e;
-            margin-top: 30px;
-            border-bottom: 2px solid #bdc3c7;
-            padding-bottom: 5px;
-        }}
-        h3 {{
-            color: #555;
-        }}
-        table {{
-            border-collapse: collapse;
-            width: 100%;
-            margin: 20px 0;
-        }}
-        table, th, td {{
-            border: 1px solid #ddd;
-        }}
-        th {{
-            background-color: #3498db;
-            color: white;
-            padding: 12px;
-            text-align: left;
-        }}
-        td {{
-            padding: 10px;
-        }}
-        tr:nth-child(even) {{
-            background-color: #f2f2f2;
-        }}
-        code {{
-            background-color: #f4f4f4;
-            padding: 2px 5px;
-            border-radius: 3px;
-        }}
-        pre {{
-            background-color: #f4f4f4;
-            padding: 15px;
-            border-radius: 5px;
-            overflow-x: auto;
-        }}
-        .metadata {{
-            background-color: #ecf0f1;
-            padding: 15px;
-            border-radius: 5px;
-            margin-bottom: 20px;
-        }}
-        .footer {{
-            margin-top: 40px;
-            padding-top: 20px;
-            border-top: 1px solid #bdc3c7;
-            font-size: 0.9em;
-            color: #7f8c8d;
-        }}
-    </style>
-</head>
-<body>
-    {html_body}
-</body>
-</html>"""
-        return html
+        return _HTML_SHELL % {'title': doc.title.translate(_HTML_ESCAPE), 'body': html_body}
 
     def to_pdf(self, doc: Document) -> bytes:
         """Convert document to PDF format"""
-        try:
-            # Try using pdfkit (requires wkhtmltopdf)
-            import pdfkit
-            html_content = self.to_html(doc)
-            pdf_bytes = pdfkit.from_string(html_content, False)
-            return pdf_bytes
-
-        except (ImportError, OSError):
-            # Fallback: try using weasyprint
+        html_content = self.to_html(doc)
+
+        renderers = [('weasyprint', self._pdf_with_weasyprint), ('pdfkit', self._pdf_with_pdfkit)]
+        if not self.prefer_weasyprint:
+            renderers.reverse()
+
+        for module_name, render in renderers:
+            if _optional_module(module_name) is None:
+                continue
             try:
-                from weasyprint import HTML
-                html_content = self.to_html(doc)
-                pdf_bytes = HTML(string=html_content).write_pdf()
-                return pdf_bytes
+                return render(html_content)
+            except OSError:
+                # wkhtmltopdf binary not installed; try the next one
+                continue
 
-            except ImportError:
-                # If no PDF library available, return HTML as bytes with a note
-                html_content = self.to_html(doc)
-                note = "<!-- PDF generation requires pdfkit or weasyprint library -->\n"
-                return (note + html_content).encode('utf-8')
+        # If no PDF library available, return HTML as bytes with a note
+        note = "<!-- PDF generation requires pdfkit or weasyprint library -->\n"
+        return (note + html_content).encode('utf-8')
+
+    def _pdf_with_weasyprint(self, html_content: str) -> bytes:
+        """Render HTML to PDF in-process with weasyprint"""
+        return _optional_module('weasyprint').HTML(string=html_content).write_pdf()
+
+    def _pdf_with_pdfkit(self, html_content: str) -> bytes:
+        """Render HTML to PDF with pdfkit (requires wkhtmltopdf)"""
+        return _optional_module('pdfkit').from_string(html_content, False)
 
     def to_docx(self, doc: Document) -> bytes:
         """Generate a Word .docx file from the document"""
-        try:
-            from docx import Document as WordDocument
-            from docx.shared import Inches, Pt, RGBColor
-            from docx.enum.text import WD_ALIGN_PARAGRAPH
-
-            word_doc = WordDocument()
-
-            # Add title
-            title = word_doc.add_heading(doc.title, level=0)
-            title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-
-            # Add document metadata
-            if doc.doc_number or doc.metadata:
-                info_table = word_doc.add_table(rows=0, cols=2)
-                info_table.style = 'Light Grid Accent 1'
-
-                if doc.doc_number:
-                    row = info_table.add_row()
-                    row.cells[0].text = 'Document Number'
-                    row.cells[1].text = doc.doc_number
-
-                if doc.metadata:
-                    for key, value in doc.metadata.items():
-                        if value and key not in ['standards', 'description']:
-                            row = info_table.add_row()
-                            row.cells[0].text = key.replace('_', ' ').title()
-                            row.cells[1].text = str(value)
-
-                word_doc.add_paragraph()  # Spacing
-
-            # Add sections
-            for sec in doc.sections:
-                if not sec.content or not sec.content.strip():
-                    continue
-
-                # Add section heading
-                word_doc.add_heading(sec.title, level=1)
-
-                # Add content based on type
-                if sec.content_type == "text":
-                    word_doc.add_paragraph(sec.content)
-
-                elif sec.content_type == "image":
-                    try:
-                        if os.path.exists(sec.content):
-                            word_doc.add_picture(sec.content, width=Inches(6))
-                        else:
-                            word_doc.add_paragraph(f"[Image: {sec.content}]")
-                    except Exception as e:
-                        word_doc.add_paragraph(f"[Image: {sec.content} - Error loading]")
-
-                elif sec.content_type == "table":
-                    # Try to parse table content
-                    self._add_table_to_word(word_doc, sec.content)
-
-                elif sec.content_type == "flowchart":
-                    word_doc.add_paragraph(f"[Flowchart: {sec.title}]")
-                    word_doc.add_paragraph(sec.content, style='Code')
-
-                elif sec.content_type == "latex":
-                    word_doc.add_paragraph(f"Equation:")
-                    word_doc.add_paragraph(sec.content, style='Code')
-
-                # Add spacing
-                word_doc.add_paragraph()
-
-            # Add footer
-            footer_para = word_doc.add_paragraph()
-            footer_para.add_run(
-                f"\nGenerated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            ).italic = True
-
-            # Save to bytes
-            buffer = io.BytesIO()
-            word_doc.save(buffer)
-            buffer.seek(0)
-            return buffer.read()
-
-        except ImportError:
+        if _optional_module('docx') is None:
             # If python-docx not available, return markdown as bytes
             return self.to_markdown(doc).encode('utf-8')
 
-    def _add_table_to_word(self, word_doc, table_content: str):
-        """Helper to add table to Word document"""
-        try:
-            from docx import Document as WordDocument
+        from docx import Document as WordDocument
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+        word_doc = WordDocument()
+
+        # Add title
+        title = word_doc.add_heading(doc.title, level=0)
+        title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+        # Add document metadata
+        if doc.doc_number or doc.metadata:
+            info_rows = []
+            if doc.doc_number:
+                info_rows.append(('Document Number', doc.doc_number))
+
+            if doc.metadata:
+                for key, value in doc.metadata.items():
+                    if value and key not in ('standards', 'description'):
+                        info_rows.append((key.replace('_', ' ').title(), str(value)))
+
+            # Create the table at its final size in one call rather than
+            # growing it row by row
+            info_table = word_doc.add_table(rows=len(info_rows), cols=2)
+            info_table.style = 'Light Grid Accent 1'
+
+            for row, (label, value) in zip(info_table.rows, info_rows):
+                label_cell, value_cell = row.cells
+                label_cell.text = label
+                value_cell.text = value
+
+            word_doc.add_paragraph()  # Spacing
+
+        # Add sections
+        section_writers = {
+            "text": self._add_text_to_word,
+            "image": self._add_image_to_word,
+            "table": self._add_table_section_to_word,
+            "flowchart": self._add_flowchart_to_word,
+            "latex": self._add_latex_to_word,
+        }
+        for sec in doc.sections:
+            if not sec.content or sec.content.isspace():
+                continue
 
-            lines = [line.strip() for line in table_content.split('\n') if line.strip()]
+            # Add section heading
+            word_doc.add_heading(sec.title, level=1)
 
-            if not lines:
-                word_doc.add_paragraph(table_content)
-                return
+            # Add content based on type
+            add_content = section_writers.get(sec.content_type)
+            if add_content:
+                add_content(word_doc, sec)
 
-            # Check if it's markdown table
-            if lines[0].startswith('|'):
-                # Parse markdown table
-                headers = [h.strip() for h in lines[0].strip('|').split('|')]
-                data_rows = []
+            # Add spacing
+            word_doc.add_paragraph()
 
-                for line in lines[2:]:  # Skip header and separator
-                    if line.startswith('|'):
-                        cells = [c.strip() for c in line.strip('|').split('|')]
-                        data_rows.append(cells)
+        # Add footer
+        footer_para = word_doc.add_paragraph()
+        footer_para.add_run(
+            f"\nGenerated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        ).italic = True
 
+        # Save to bytes via a spooled file so large documents with many
+        # pictures don't hold a second full copy in memory while zipping
+        with tempfile.SpooledTemporaryFile(max_size=_DOCX_SPOOL_MAX_SIZE) as buffer:
+            _save_docx(word_doc, buffer)
+            buffer.seek(0)
+            return buffer.read()
+
+    def _add_text_to_word(self, word_doc, sec: Section):
+        """Add a text section body to the Word document"""
+        word_doc.add_paragraph(sec.content)
+
+    def _add_image_to_word(self, word_doc, sec: Section):
+        """Add an image section, or a placeholder when the file is missing"""
+        from docx.shared import Inches
+
+        try:
+            if os.path.exists(sec.content):
+                word_doc.add_picture(sec.content, width=Inches(6))
             else:
-                # Assume CSV
-                headers = [h.strip() for h in lines[0].split(',')]
-                data_rows = [[c.strip() for c in line.split(',')] for line in lines[1:]]
+                word_doc.add_paragraph(f"[Image: {sec.content}]")
+        except Exception as e:
+            word_doc.add_paragraph(f"[Image: {sec.content} - Error loading]")
+
+    def _add_table_section_to_word(self, word_doc, sec: Section):
+        """Add a table section; falls back to plain text if it doesn't parse"""
+        self._add_table_to_word(word_doc, sec.content)
+
+    def _add_flowchart_to_word(self, word_doc, sec: Section):
+        """Add a flowchart section as its source text"""
+        word_doc.add_paragraph(f"[Flowchart: {sec.title}]")
+        word_doc.add_paragraph(sec.content, style='Code')
+
+    def _add_latex_to_word(self, word_doc, sec: Section):
+        """Add a LaTeX equation section as its source text"""
+        word_doc.add_paragraph(f"Equation:")
+        word_doc.add_paragraph(sec.content, style='Code')
+
+    def _add_table_to_word(self, word_doc, table_content: str):
+        """Helper to add table to Word document"""
+        try:
+            headers, data_rows = _parse_table(table_content)
 
             # Create table
             if headers and data_rows:
@@ -346,64 +540,84 @@ class DocumentExporter:
 
     def to_excel(self, doc: Document) -> bytes:
         """Export document tables to Excel format"""
-        try:
-            import xlsxwriter
-
-            output = io.BytesIO()
-            workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-
-            # Create overview sheet
-            overview = workbook.add_worksheet('Overview')
-            bold = workbook.add_format({'bold': True})
-
-            overview.write('A1', 'SOP Title', bold)
-            overview.write('B1', doc.title)
-            overview.write('A2', 'Document Number', bold)
-            overview.write('B2', doc.doc_number)
-            overview.write('A3', 'Created', bold)
-            overview.write('B3', doc.created_at.strftime('%Y-%m-%d'))
-
-            # Add sheets for each table section
-            sheet_count = 0
-            for sec in doc.sections:
-                if sec.content_type == "table" and sec.content:
-                    sheet_count += 1
-                    sheet_name = f"{sec.title[:25]}_{sheet_count}" if len(sec.title) > 25 else sec.title[:31]
-                    worksheet = workbook.add_worksheet(sheet_name)
-
-                    # Parse table content
-                    lines = [line.strip() for line in sec.content.split('\n') if line.strip()]
-
-                    if lines and lines[0].startswith('|'):
-                        # Markdown table
-                        headers = [h.strip() for h in lines[0].strip('|').split('|')]
-                        data_rows = []
-                        for line in lines[2:]:
-                            if line.startswith('|'):
-                                cells = [c.strip() for c in line.strip('|').split('|')]
-                                data_rows.append(cells)
-                    else:
-                        # CSV
-                        headers = [h.strip() for h in lines[0].split(',')]
-                        data_rows = [[c.strip() for c in line.split(',')] for line in lines[1:]]
-
-                    # Write headers
-                    for col, header in enumerate(headers):
-                        worksheet.write(0, col, header, bold)
-
-                    # Write data
-                    for row_idx, row in enumerate(data_rows, start=1):
-                        for col_idx, cell_value in enumerate(row):
-                            worksheet.write(row_idx, col_idx, cell_value)
-
-            workbook.close()
-            output.seek(0)
-            return output.read()
-
-        except ImportError:
-            # Fallback: return CSV
-            csv_content = self._to_csv(doc)
-            return csv_content.encode('utf-8')
+        overview_rows = [
+            ['SOP Title', doc.title],
+            ['Document Number', doc.doc_number],
+            ['Created', doc.created_at.strftime('%Y-%m-%d')],
+        ]
+        table_sheets = self._excel_table_sheets(doc)
+
+        # pyexcelerate writes whole sheets at once and is much faster on
+        # large tables; xlsxwriter is the per-cell fallback
+        if _optional_module('pyexcelerate') is not None:
+            return self._excel_with_pyexcelerate(overview_rows, table_sheets)
+
+        if _optional_module('xlsxwriter') is not None:
+            return self._excel_with_xlsxwriter(overview_rows, table_sheets)
+
+        # Fallback: return CSV
+        csv_content = self._to_csv(doc)
+        return csv_content.encode('utf-8')
+
+    def _excel_table_sheets(self, doc: Document) -> list:
+        """Parse table sections into (sheet_name, headers, data_rows) tuples"""
+        table_sheets = []
+        sheet_count = 0
+        for sec in doc.sections:
+            if sec.content_type == "table" and sec.content:
+                sheet_count += 1
+                sheet_name = f"{sec.title[:25]}_{sheet_count}" if len(sec.title) > 25 else sec.title[:31]
+
+                # A table with no cells still gets its (empty) sheet
+                headers, data_rows = _parse_table(sec.content)
+                table_sheets.append((sheet_name, headers, data_rows))
+
+        return table_sheets
+
+    def _excel_with_pyexcelerate(self, overview_rows: list, table_sheets: list) -> bytes:
+        """Build the workbook with pyexcelerate, one bulk write per sheet"""
+        from pyexcelerate import Workbook, Style, Font
+
+        workbook = Workbook()
+        bold = Style(font=Font(bold=True))
+
+        # Overview sheet, labels in bold
+        overview = workbook.new_sheet('Overview', data=overview_rows)
+        overview.set_col_style(1, bold)
+
+        # One sheet per table section, header row in bold
+        for sheet_name, headers, data_rows in table_sheets:
+            worksheet = workbook.new_sheet(sheet_name, data=[headers, *data_rows])
+            worksheet.set_row_style(1, bold)
+
+        output = io.BytesIO()
+        workbook.save(output)
+        return output.getvalue()
+
+    def _excel_with_xlsxwriter(self, overview_rows: list, table_sheets: list) -> bytes:
+        """Build the workbook with xlsxwriter"""
+        import xlsxwriter
+
+        output = io.BytesIO()
+        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+        bold = workbook.add_format({'bold': True})
+
+        # Create overview sheet
+        overview = workbook.add_worksheet('Overview')
+        for row_idx, (label, value) in enumerate(overview_rows):
+            overview.write(row_idx, 0, label, bold)
+            overview.write(row_idx, 1, value)
+
+        # Add sheets for each table section
+        for sheet_name, headers, data_rows in table_sheets:
+            worksheet = workbook.add_worksheet(sheet_name)
+            worksheet.write_row(0, 0, headers, bold)
+            for row_idx, row in enumerate(data_rows, start=1):
+                worksheet.write_row(row_idx, 0, row)
+
+        workbook.close()
+        output.seek(0)
+        return output.read()
 
     def _to_csv(self, doc: Document) -> str:
         """Convert document tables to CSV"""
@@ -3,31 +3,214 @@ AI Content Generation Engine
 Orchestrates calls to multiple LLM APIs with intelligent routing
 """
 
+import asyncio
+import logging
 import os
-from typing import Dict, Optional
+import re
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
 from .models import Document, Section
+from .cache import GenCache, LLMCache, SemanticCache
 
 # Load environment variables from .env file
 from dotenv import load_dotenv
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # API configurations
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
 
+# System prompt shared by every section request. It never changes between
+# calls, so it forms a stable prefix both providers can serve from their
+# prompt cache; anything document-specific belongs in the user prompt.
+# Providers only cache prefixes of at least 1024 tokens, which is why the
+# style guide is written out in full (about 1,300 tokens); keep it above
+# that when editing.
+SYSTEM_PROMPT = """You are an expert technical writer specializing in Standard Operating Procedures (SOPs) for testing laboratories, manufacturing and quality management. You write one section of an SOP per request; the section to write and the document it belongs to are given in the user message.
+
+Style guide for every section:
+
+Language and tone
+- Write in formal, professional English. Use the imperative mood for instructions ("Record the ambient temperature", not "The ambient temperature should be recorded").
+- Use "shall" for mandatory requirements, "should" for recommendations and "may" for permitted options, consistent with ISO/IEC Directives Part 2. Do not use "must" or "will" for requirements.
+- Keep sentences short, with one action or requirement per sentence. Avoid marketing language, rhetorical questions, humour and filler phrases such as "it is important to note that".
+- Address the reader by role (Operator, Test Engineer, Supervisor, Quality Assurance) rather than "you" or "we".
+- Spell out an abbreviation at its first use in a section, followed by the abbreviation in parentheses, unless it is a unit symbol or a standard designation.
+
+Technical precision
+- Be specific and unambiguous. State quantities, units, tolerances, limits, durations and sample sizes wherever they apply (for example "85 °C ± 2 °C for 1000 h", not "high temperature for a long time").
+- Use SI units and their correct symbols, with a space between the value and the unit (25 °C, 1000 W/m², 10 mA). Use a period as the decimal separator.
+- Cite standards by full designation and year where known (for example IEC 61215-2:2021, ISO/IEC 17025:2017). If the edition is unknown, cite the designation without a year rather than guessing one.
+- Distinguish measured values from specified limits, and state the measurement uncertainty or instrument accuracy where it affects a pass/fail decision.
+- Never invent numerical limits that contradict a cited standard. Where a value depends on the product specification or the customer, write a bracketed placeholder such as [Specified limit] instead.
+
+Structure and formatting
+- Output Markdown only. Do not wrap the answer in a code block and do not add commentary before or after the section.
+- Do not repeat the section heading; start directly with the section content. Use level-3 headings (###) only when a section needs sub-divisions.
+- Use numbered lists for sequential steps, so each step can be referenced by number, and bulleted lists for unordered items.
+- Put one action per numbered step. Give the expected result or acceptance check immediately after the step it belongs to.
+- Use Markdown tables (pipe syntax with a header row) for tabular data such as equipment lists, test conditions, risk matrices and acceptance criteria. Keep tables to the columns that carry information.
+- Use bold sparingly, for warnings, hold points and key terms at their first use. Do not use italics for emphasis.
+- Mark safety-critical information with a bold prefix at the start of the line: **WARNING:** for risk of injury, **CAUTION:** for risk of equipment damage or invalid results, and **NOTE:** for supplementary information.
+
+Content rules by section type
+- Purpose: two to four sentences stating what the procedure achieves and why it is needed. No procedural detail.
+- Scope: what the procedure covers and what it excludes, the products, equipment or locations it applies to, and the governing standards.
+- Definitions and Abbreviations: a list or table of terms used in the SOP, each with a one-sentence definition. Prefer definitions taken from the cited standards.
+- Responsibilities: one entry per role, each listing the concrete duties the role performs under this SOP, including who approves, who executes and who reviews records.
+- Normative References: a list of the documents cited in the SOP, each with designation, year where known and full title. Do not list documents that the SOP does not use.
+- HSE Risk Assessment: hazards, their causes, risk level (High/Medium/Low), control measures, required personal protective equipment and emergency response, preferably as a table.
+- Equipment and Materials: each item with its specification, range or accuracy, quantity and calibration requirement, preferably as a table.
+- Test Procedure or Method: preconditions and preparation first, then numbered steps, then post-test actions. Include set points, dwell times, measurement intervals and hold points.
+- Acceptance Criteria: measurable pass/fail criteria, each traceable to a requirement in a cited standard or specification, preferably as a table.
+- Records and Documentation: which records are produced, their content, format, retention period and where they are stored.
+
+Consistency and integrity
+- Do not invent company names, personnel names, equipment serial numbers, document numbers or dates. Use bracketed placeholders such as [Company Name], [Document No.], [Equipment ID] and [Date].
+- Keep each section self-contained, but use terminology, role names and units consistently with the rest of the SOP and with the SOP title given.
+- Where the context given by the user conflicts with a cited standard, follow the user's context and add a **NOTE:** identifying the deviation.
+- If information needed for a requirement is missing, write the requirement with a placeholder rather than omitting it or guessing.
+- Do not include revision history, approval signatures or document control blocks unless the section explicitly asks for them."""
+
+# Section-title keywords (matched as substrings) that select a preferred model
+_CLAUDE_SECTION_RE = re.compile("reference|normative|citation")
+_GPT4_SECTION_RE = re.compile("procedure|method|steps|test|purpose|scope|objective")
+
+# Anthropic only caches prefixes marked explicitly, and only on models that
+# support prompt caching (see model_config["claude"])
+ANTHROPIC_SYSTEM = [{"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}]
+
+# Output token allowance for each section request
+MAX_OUTPUT_TOKENS = 2000
+
+# Retries for transient API failures (connection errors, timeouts, 408/409/
+# 429/5xx). Both SDKs back off exponentially with jitter and honour
+# Retry-After. A transient error that outlasts the retries is raised to the
+# caller; only non-retryable errors (auth, invalid request) fall back to
+# placeholder content.
+API_MAX_RETRIES = 6
+
+# SDK exception classes (same names in openai and anthropic) that mean the
+# request may succeed later; APITimeoutError subclasses APIConnectionError
+_TRANSIENT_ERROR_NAMES = ("RateLimitError", "APIConnectionError", "InternalServerError", "OverloadedError")
+
+
+def _is_transient(error: Exception) -> bool:
+    """True if error is a rate-limit, timeout, connection or server error from either SDK"""
+    for module_name in ("openai", "anthropic"):
+        # The SDK that raised the error has necessarily been imported already
+        module = sys.modules.get(module_name)
+        if module is None:
+            continue
+        transient = tuple(
+            getattr(module, name) for name in _TRANSIENT_ERROR_NAMES
+            if isinstance(getattr(module, name, None), type)
+        )
+        if transient and isinstance(error, transient):
+            return True
+    return False
+
+
+class RateLimiter:
+    """
+    Proactive token-bucket limiter for async API calls
+
+    Tracks requests-per-minute and tokens-per-minute budgets that refill
+    continuously. Callers await acquire() before each request, so a burst
+    of concurrent section requests queues here instead of hitting HTTP 429.
+    """
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._lock = None
+        self._lock_loop = None
+
+    def _refill(self) -> None:
+        """Top up both buckets for the time elapsed since the last call"""
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def _get_lock(self) -> asyncio.Lock:
+        """Lock for the running event loop (locks can't be shared across loops)"""
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def acquire(self, tokens: int) -> None:
+        """
+        Wait until one request and the given token budget are available
+
+        Args:
+            tokens: Estimated tokens for the request (prompt + max output)
+        """
+        # A request bigger than the whole bucket would otherwise wait forever
+        tokens = min(tokens, self.tpm)
+
+        # Waiters queue on the lock, so budget is handed out in arrival order
+        async with self._get_lock():
+            while True:
+                self._refill()
+                if self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return
+
+                wait = max(
+                    (1 - self._requests) * 60 / self.rpm,
+                    (tokens - self._tokens) * 60 / self.tpm,
+                )
+                await asyncio.sleep(max(wait, 0.01))
+
 
 class AIContentGenerator:
     """Handles AI-powered content generation with multi-model support"""
 
-    def __init__(self, default_model: str = "gpt4", use_mock: bool = None):
+    def __init__(
+        self,
+        default_model: str = "gpt4",
+        use_mock: bool = None,
+        temperature: float = 0.0,
+        cache: Optional[LLMCache] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        gen_cache: Optional[GenCache] = None,
+        use_batch_api: bool = False
+    ):
         """
         Initialize AI generator
 
         Args:
             default_model: Default model to use (gpt4, claude, mock)
             use_mock: If True, use mock responses. If None, auto-detect based on API keys
+            temperature: Sampling temperature for both providers. The default of 0
+                keeps SOP text deterministic and lets repeats be served from
+                the response cache; above 0 every call is a fresh draft and
+                the exact-match cache is bypassed
+            cache: Response cache (defaults to an in-memory LLMCache)
+            semantic_cache: Optional similarity cache consulted after the exact
+                cache (off unless passed in)
+            gen_cache: Optional cache of per-section response skeletons reused
+                across SOP titles (off unless passed in)
+            use_batch_api: Route generate_document through the providers' batch
+                APIs (half price, but results can take hours)
         """
         self.default_model = default_model
+        self.temperature = temperature
+        self.cache = cache if cache is not None else LLMCache()
+        self.semantic_cache = semantic_cache
+        self.gen_cache = gen_cache
+        self.use_batch_api = use_batch_api
 
         # Auto-detect if we should use mock mode
         if use_mock is None:
@@ -37,26 +220,57 @@ class AIContentGenerator:
 
         self.prompt_templates = self._initialize_prompt_templates()
         self.model_config = self._initialize_model_config()
+        self._route_cache: Dict[str, str] = {}
+
+        # One limiter per API-backed model, sized from model_config
+        self.rate_limiters = {
+            key: RateLimiter(cfg["rpm"], cfg["tpm"])
+            for key, cfg in self.model_config.items()
+            if cfg.get("rpm") and cfg.get("tpm")
+        }
+
+        # SDK clients keep a connection pool, so they are created once and
+        # reused for every section instead of reconnecting per request
+        self._openai = None
+        self._anthropic = None
+
+        # Async SDK clients are bound to the event loop they were created on,
+        # so they are rebuilt whenever a new loop (e.g. a new asyncio.run) uses them
+        self._async_loop = None
+        self._async_openai = None
+        self._async_anthropic = None
 
     def _initialize_model_config(self) -> Dict:
-        """Initialize available models and their characteristics"""
+        """
+        Initialize available models and their characteristics
+
+        rpm/tpm are the requests- and tokens-per-minute limits the async path
+        throttles to; defaults match the providers' entry tiers, raise them
+        to match your account.
+        """
         return {
             "gpt4": {
                 "provider": "openai",
-                "model_name": "gpt-4",
+                "model_name": "gpt-4o",
                 "max_tokens": 8000,
+                "rpm": 500,
+                "tpm": 10000,
                 "strengths": ["detailed generation", "reasoning", "step-by-step procedures"]
             },
             "gpt35": {
                 "provider": "openai",
                 "model_name": "gpt-3.5-turbo",
                 "max_tokens": 4000,
+                "rpm": 3500,
+                "tpm": 200000,
                 "strengths": ["general content", "fast responses"]
             },
             "claude": {
                 "provider": "anthropic",
-                "model_name": "claude-3-sonnet-20240229",
+                "model_name": "claude-sonnet-4-20250514",
                 "max_tokens": 100000,
+                "rpm": 50,
+                "tpm": 40000,
                 "strengths": ["summarization", "detailed analysis", "citations"]
             },
             "mock": {
@@ -68,13 +282,14 @@ class AIContentGenerator:
         }
 
     def _initialize_prompt_templates(self) -> Dict[str, str]:
-        """Initialize default prompt templates for each section type"""
-        return {
-            "Purpose": """You are an expert in writing Standard Operating Procedures (SOPs).
-Write a clear and concise Purpose section for this SOP.
+        """
+        Initialize default prompt templates for each section type
 
-SOP Title: {topic}
-Context: {context}
+        Instructions come first and the per-document fields last, so requests
+        for the same section share a token prefix the providers can cache.
+        """
+        return {
+            "Purpose": """Write a clear and concise Purpose section for this SOP.
 
 The Purpose section should:
 - Explain WHAT this procedure does
@@ -82,66 +297,66 @@ The Purpose section should:
 - Be 2-4 sentences
 - Use formal, professional language
 
+SOP Title: {topic}
+Context: {context}
+
 Generate the Purpose section:""",
 
             "Scope": """Write a Scope section that defines what is included and excluded in this SOP.
 
-SOP Title: {topic}
-Context: {context}
-
 The Scope section should:
 - Clearly define what is covered
 - Specify any limitations or exclusions
 - Mention applicable standards or regulations
 - Be specific and concise
 
+SOP Title: {topic}
+Context: {context}
+
 Generate the Scope section:""",
 
             "Definitions and Abbreviations": """Provide key definitions and abbreviations for this SOP.
 
-SOP Title: {topic}
-Context: {context}
-
 Include:
 - Technical terms specific to this procedure
 - Abbreviations and acronyms used
 - Industry-standard definitions
 - Format as a bulleted or numbered list
 
+SOP Title: {topic}
+Context: {context}
+
 Generate the Definitions and Abbreviations:""",
 
             "Responsibilities": """List the roles and their responsibilities in carrying out this SOP.
 
-SOP Title: {topic}
-Context: {context}
-
 Include:
 - Key personnel roles (Operator, Supervisor, QA, etc.)
 - Specific responsibilities for each role
 - Use bullet points
 - Be clear about who does what
 
+SOP Title: {topic}
+Context: {context}
+
 Generate the Responsibilities section:""",
 
             "Normative References": """List relevant standards, references, and documents applicable to this SOP.
 
-SOP Title: {topic}
-Standards: {standards}
-Context: {context}
-
 Include:
 - International standards (ISO, IEC, ASTM, etc.)
 - Internal documents and procedures
 - Regulatory requirements
 - Use proper citation format
 
+SOP Title: {topic}
+Standards: {standards}
+Context: {context}
+
 Generate the Normative References section:""",
 
             "HSE Risk Assessment": """Provide a Health, Safety, and Environment (HSE) risk assessment for this procedure.
 
-SOP Title: {topic}
-Context: {context}
-
 Include:
 - Potential hazards
 - Risk levels (High/Medium/Low)
@@ -149,26 +364,26 @@ Include:
 - Emergency procedures
 - Environmental considerations
 
+SOP Title: {topic}
+Context: {context}
+
 Generate the HSE Risk Assessment section:""",
 
             "Equipment and Materials": """List all equipment and materials needed for this procedure.
 
-SOP Title: {topic}
-Context: {context}
-
 Include:
 - Specific equipment with model/specifications
 - Consumable materials
 - Calibration requirements
 - Quantity requirements
 
+SOP Title: {topic}
+Context: {context}
+
 Generate the Equipment and Materials section:""",
 
             "Test Procedure": """Write a detailed step-by-step test procedure.
 
-SOP Title: {topic}
-Context: {context}
-
 Requirements:
 - Use numbered steps
 - Be clear and unambiguous
@@ -176,26 +391,26 @@ Requirements:
 - Mention quality checks
 - Assume reader has basic technical knowledge
 
+SOP Title: {topic}
+Context: {context}
+
 Generate the Test Procedure section:""",
 
             "Procedure": """Write a detailed step-by-step procedure.
 
-SOP Title: {topic}
-Context: {context}
-
 Requirements:
 - Use numbered steps
 - Be clear and unambiguous
 - Include critical parameters
 - Mention quality checks
 
+SOP Title: {topic}
+Context: {context}
+
 Generate the Procedure section:""",
 
             "Data Analysis and Requirements": """Describe data analysis methods and requirements.
 
-SOP Title: {topic}
-Context: {context}
-
 Include:
 - Data collection methods
 - Analysis techniques
@@ -203,32 +418,35 @@ Include:
 - Statistical requirements
 - Data recording procedures
 
+SOP Title: {topic}
+Context: {context}
+
 Generate the Data Analysis and Requirements section:""",
 
             "Pass/Fail Criteria": """Define clear pass/fail criteria for this procedure.
 
-SOP Title: {topic}
-Context: {context}
-
 Include:
 - Specific acceptance criteria
 - Quantitative limits or thresholds
 - Visual inspection criteria
 - References to standards
 
+SOP Title: {topic}
+Context: {context}
+
 Generate the Pass/Fail Criteria section:""",
 
             "Safety Considerations": """Describe safety considerations for this procedure.
 
-SOP Title: {topic}
-Context: {context}
-
 Include:
 - Hazards and risks
 - Required PPE
 - Safety protocols
 - Emergency procedures
 
+SOP Title: {topic}
+Context: {context}
+
 Generate the Safety Considerations section:"""
         }
 
@@ -245,16 +463,23 @@ Generate the Safety Considerations section:"""
         if self.use_mock:
             return "mock"
 
+        # Routing only depends on the title and the configured keys, so each
+        # title is resolved once per generator
+        model_key = self._route_cache.get(section_title)
+        if model_key is None:
+            model_key = self._route_cache[section_title] = self._route_by_keywords(section_title)
+        return model_key
+
+    @staticmethod
+    def _route_by_keywords(section_title: str) -> str:
+        """Pick a model from the section title keywords and available keys"""
         title_lower = section_title.lower()
 
         # Route based on section characteristics
-        if any(word in title_lower for word in ["reference", "normative", "citation"]):
+        if _CLAUDE_SECTION_RE.search(title_lower):
             return "claude" if ANTHROPIC_API_KEY else "gpt4"
 
-        if any(word in title_lower for word in ["procedure", "method", "steps", "test"]):
-            return "gpt4" if OPENAI_API_KEY else "claude"
-
-        if any(word in title_lower for word in ["purpose", "scope", "objective"]):
+        if _GPT4_SECTION_RE.search(title_lower):
             return "gpt4" if OPENAI_API_KEY else "claude"
 
         # Default routing
@@ -280,15 +505,200 @@ Generate the Safety Considerations section:"""
             additional_context: Additional user instructions
 
         Returns:
-            Generated content string
+            Generated content string; placeholder text if the request was
+            rejected (e.g. bad API key)
+
+        Raises:
+            The SDK's rate-limit, timeout, connection or server error if it
+            persists through API_MAX_RETRIES retries
+        """
+        model_key, prompt = self._prepare_generation(document, section, additional_context)
+
+        # Generate content
+        if model_key in ["gpt4", "gpt35"]:
+            return self._generate_openai(prompt, model_key, (section.title, document.title))
+        elif model_key == "claude":
+            return self._generate_anthropic(prompt, (section.title, document.title))
+        else:
+            return self._generate_mock_content(section.title, document.title)
+
+    def generate_section_content_stream(
+        self,
+        document: Document,
+        section: Section,
+        additional_context: str = ""
+    ) -> Iterator[str]:
+        """
+        Streaming version of generate_section_content
+
+        Yields text chunks as the model produces them, so callers can render
+        a section while it is still being written. Cached and mock content
+        arrive as a single chunk. Errors are handled as in
+        generate_section_content.
+        """
+        model_key, prompt = self._prepare_generation(document, section, additional_context)
+        cache_scope = (section.title, document.title)
+
+        if model_key in ["gpt4", "gpt35"]:
+            yield from self._stream_openai(prompt, model_key, cache_scope)
+        elif model_key == "claude":
+            yield from self._stream_anthropic(prompt, cache_scope)
+        else:
+            yield self._generate_mock_content(section.title, document.title)
+
+    async def agenerate_section_content(
+        self,
+        document: Document,
+        section: Section,
+        additional_context: str = ""
+    ) -> str:
+        """Async version of generate_section_content"""
+        model_key, prompt = self._prepare_generation(document, section, additional_context)
+        return await self._agenerate_prepared(model_key, prompt, document, section)
+
+    async def _agenerate_prepared(
+        self,
+        model_key: str,
+        prompt: str,
+        document: Document,
+        section: Section
+    ) -> str:
+        """Dispatch an already-built prompt to its model"""
+        if model_key in ["gpt4", "gpt35"]:
+            return await self._agenerate_openai(prompt, model_key, (section.title, document.title))
+        elif model_key == "claude":
+            return await self._agenerate_anthropic(prompt, (section.title, document.title))
+        else:
+            return self._generate_mock_content(section.title, document.title)
+
+    async def agenerate_document(
+        self,
+        document: Document,
+        additional_context: str = "",
+        sections: Optional[List[Section]] = None
+    ) -> List[str]:
+        """
+        Generate content for several sections concurrently
+
+        Args:
+            document: The document containing the sections
+            additional_context: Additional user instructions
+            sections: Sections to generate (defaults to all document sections)
+
+        Returns:
+            Generated content strings, in the same order as the sections
+
+        Raises:
+            The first transient API error that outlasts the retries (see
+            generate_section_content)
+        """
+        if sections is None:
+            sections = document.sections
+
+        results: List[Optional[str]] = [None] * len(sections)
+
+        async def run_group(model_key: str, jobs: List[Tuple[int, Section, str]]) -> None:
+            contents = await asyncio.gather(*(
+                self._agenerate_prepared(model_key, prompt, document, sec)
+                for _, sec, prompt in jobs
+            ))
+            for (index, _, _), content in zip(jobs, contents):
+                results[index] = content
+
+        # Requests are network-bound, so every group goes out at once; each
+        # group shares one provider client and rate limiter
+        plan = self.plan_generation(document, additional_context, sections)
+        await asyncio.gather(*(run_group(key, jobs) for key, jobs in plan.items()))
+        return results
+
+    def plan_generation(
+        self,
+        document: Document,
+        additional_context: str = "",
+        sections: Optional[List[Section]] = None
+    ) -> Dict[str, List[Tuple[int, Section, str]]]:
+        """
+        Build every section prompt in one pass, grouped by model
+
+        Args:
+            document: The document containing the sections
+            additional_context: Additional user instructions
+            sections: Sections to plan (defaults to all document sections)
+
+        Returns:
+            Model key -> [(position in sections, section, prompt), ...]
+        """
+        if sections is None:
+            sections = document.sections
+
+        fields = self._prompt_fields(document, additional_context)
+        plan: Dict[str, List[Tuple[int, Section, str]]] = {}
+        for index, section in enumerate(sections):
+            model_key, prompt = self._prepare_generation(document, section, additional_context, fields)
+            plan.setdefault(model_key, []).append((index, section, prompt))
+        return plan
+
+    def generate_document(
+        self,
+        document: Document,
+        additional_context: str = "",
+        sections: Optional[List[Section]] = None
+    ) -> List[str]:
+        """Blocking wrapper around agenerate_document (or generate_document_batch)"""
+        if self.use_batch_api:
+            return self.generate_document_batch(document, additional_context, sections)
+        return asyncio.run(self.agenerate_document(document, additional_context, sections))
+
+    def generate_document_batch(
+        self,
+        document: Document,
+        additional_context: str = "",
+        sections: Optional[List[Section]] = None,
+        poll_interval: float = 30.0
+    ) -> List[str]:
+        """
+        Generate sections through the OpenAI/Anthropic batch APIs
+
+        Blocks until the batch jobs finish; meant for non-interactive runs.
+        Use BatchProcessor.run directly to also get the failure reasons.
+
+        Returns:
+            Generated content strings, in the same order as the sections;
+            sections that failed hold an error placeholder
         """
-        # Prepare context
-        context = {
+        from .batch import BatchProcessor
+
+        processor = BatchProcessor(self, poll_interval=poll_interval)
+        contents, _ = processor.run(document, additional_context, sections)
+        return contents
+
+    @staticmethod
+    def _prompt_fields(document: Document, additional_context: str) -> Dict[str, str]:
+        """Document-level values substituted into every section prompt"""
+        return {
             "topic": document.title,
             "standards": document.metadata.get("standards", ""),
             "context": additional_context or document.metadata.get("description", "")
         }
 
+    def _prepare_generation(
+        self,
+        document: Document,
+        section: Section,
+        additional_context: str,
+        fields: Optional[Dict[str, str]] = None
+    ) -> Tuple[str, str]:
+        """
+        Build the prompt for a section and pick its model
+
+        Args:
+            fields: Precomputed _prompt_fields, when preparing several sections
+
+        Returns:
+            (model_key, prompt)
+        """
+        context = fields if fields is not None else self._prompt_fields(document, additional_context)
+
         # Get prompt template
         prompt_template = self.prompt_templates.get(
             section.title,
@@ -305,70 +715,351 @@ Generate the Safety Considerations section:"""
         # Route to appropriate model
         model_key = self.route_model_for_section(section.title)
 
-        # Generate content
-        if model_key == "mock":
-            return self._generate_mock_content(section.title, document.title)
-        elif model_key in ["gpt4", "gpt35"]:
-            return self._generate_openai(prompt, model_key)
-        elif model_key == "claude":
-            return self._generate_anthropic(prompt)
-        else:
-            return self._generate_mock_content(section.title, document.title)
+        return model_key, prompt
+
+    def _cache_key(self, model_name: str, system: str, prompt: str) -> Optional[str]:
+        """Cache key for a request, or None when responses aren't deterministic"""
+        if self.temperature != 0:
+            return None
+        return LLMCache.make_key(
+            model=model_name,
+            system=system,
+            prompt=prompt,
+            temperature=self.temperature,
+            max_tokens=MAX_OUTPUT_TOKENS
+        )
 
-    def _generate_openai(self, prompt: str, model_key: str) -> str:
-        """Generate content using OpenAI API"""
-        try:
+    def _lookup_cached(
+        self,
+        model_name: str,
+        system: str,
+        prompt: str,
+        cache_scope: Tuple[str, str]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Check the enabled caches, exact match first
+
+        Args:
+            cache_scope: (section title, document title) of the request
+
+        Returns:
+            (cache_key, cached response or None)
+        """
+        section_title, topic = cache_scope
+        cache_key = self._cache_key(model_name, system, prompt)
+        cached = self.cache.get(cache_key) if cache_key else None
+        if cached is None and self.gen_cache is not None:
+            cached = self.gen_cache.get(model_name, section_title, prompt, topic)
+        if cached is None and self.semantic_cache is not None:
+            cached = self.semantic_cache.get(f"{model_name}:{section_title}", prompt)
+        return cache_key, cached
+
+    async def _alookup_cached(
+        self,
+        model_name: str,
+        system: str,
+        prompt: str,
+        cache_scope: Tuple[str, str]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """_lookup_cached for the async path; embedding calls run off the event loop"""
+        if self.semantic_cache is None:
+            return self._lookup_cached(model_name, system, prompt, cache_scope)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self._lookup_cached, model_name, system, prompt, cache_scope
+        )
+
+    def _store_cached(
+        self,
+        cache_key: Optional[str],
+        model_name: str,
+        prompt: str,
+        cache_scope: Tuple[str, str],
+        content: str
+    ) -> None:
+        """Record a successful completion in the enabled caches"""
+        section_title, topic = cache_scope
+        if cache_key:
+            self.cache.set(cache_key, content)
+        if self.gen_cache is not None:
+            self.gen_cache.set(model_name, section_title, prompt, topic, content)
+        if self.semantic_cache is not None:
+            self.semantic_cache.set(f"{model_name}:{section_title}", prompt, content)
+
+    # The SDKs are imported when a client is first created, so mock-only runs
+    # never load them and later calls skip the import statement entirely
+
+    def _openai_client(self):
+        """Shared synchronous OpenAI client"""
+        if self._openai is None:
+            import openai
+            self._openai = openai.OpenAI(api_key=OPENAI_API_KEY, max_retries=API_MAX_RETRIES)
+        return self._openai
+
+    def _anthropic_client(self):
+        """Shared synchronous Anthropic client"""
+        if self._anthropic is None:
+            import anthropic
+            self._anthropic = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY, max_retries=API_MAX_RETRIES)
+        return self._anthropic
+
+    def _async_openai_client(self):
+        """Async OpenAI client for the running event loop"""
+        self._reset_async_clients_for_loop()
+        if self._async_openai is None:
             import openai
+            self._async_openai = openai.AsyncOpenAI(api_key=OPENAI_API_KEY, max_retries=API_MAX_RETRIES)
+        return self._async_openai
 
-            openai.api_key = OPENAI_API_KEY
+    def _async_anthropic_client(self):
+        """Async Anthropic client for the running event loop"""
+        self._reset_async_clients_for_loop()
+        if self._async_anthropic is None:
+            import anthropic
+            self._async_anthropic = anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY, max_retries=API_MAX_RETRIES)
+        return self._async_anthropic
+
+    def close(self) -> None:
+        """Close pooled connections held by the synchronous clients"""
+        for client in (self._openai, self._anthropic):
+            if client is not None:
+                client.close()
+        self._openai = None
+        self._anthropic = None
+
+    async def aclose(self) -> None:
+        """Close pooled connections held by the async clients"""
+        for client in (self._async_openai, self._async_anthropic):
+            if client is not None:
+                await client.close()
+        self._async_openai = None
+        self._async_anthropic = None
+
+    def _generate_openai(self, prompt: str, model_key: str, cache_scope: Tuple[str, str] = ("", "")) -> str:
+        """Generate content using OpenAI API"""
+        try:
+            client = self._openai_client()
             model_name = self.model_config[model_key]["model_name"]
 
-            response = openai.chat.completions.create(
+            cache_key, cached = self._lookup_cached(model_name, SYSTEM_PROMPT, prompt, cache_scope)
+            if cached is not None:
+                return cached
+
+            response = client.chat.completions.create(
                 model=model_name,
                 messages=[
-                    {"role": "system", "content": "You are an expert technical writer specializing in Standard Operating Procedures."},
+                    {"role": "system", "content": SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.7,
-                max_tokens=2000
+                temperature=self.temperature,
+                max_tokens=MAX_OUTPUT_TOKENS
             )
 
-            return response.choices[0].message.content.strip()
+            content = response.choices[0].message.content.strip()
+            self._store_cached(cache_key, model_name, prompt, cache_scope, content)
+            return content
 
         except Exception as e:
-            print(f"OpenAI API error: {e}")
+            if _is_transient(e):
+                raise
+            logger.error("OpenAI API error: %s", e)
             return self._generate_mock_content("Error", "OpenAI API call failed")
 
-    def _generate_anthropic(self, prompt: str) -> str:
+    def _generate_anthropic(self, prompt: str, cache_scope: Tuple[str, str] = ("", "")) -> str:
         """Generate content using Anthropic Claude API"""
         try:
-            import anthropic
+            client = self._anthropic_client()
+            model_name = self.model_config["claude"]["model_name"]
 
-            client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+            cache_key, cached = self._lookup_cached(model_name, SYSTEM_PROMPT, prompt, cache_scope)
+            if cached is not None:
+                return cached
 
             response = client.messages.create(
-                model="claude-3-sonnet-20240229",
-                max_tokens=2000,
+                model=model_name,
+                max_tokens=MAX_OUTPUT_TOKENS,
+                temperature=self.temperature,
+                system=ANTHROPIC_SYSTEM,
                 messages=[
                     {"role": "user", "content": prompt}
                 ]
             )
 
-            return response.content[0].text.strip()
+            content = response.content[0].text.strip()
+            self._store_cached(cache_key, model_name, prompt, cache_scope, content)
+            return content
 
         except Exception as e:
-            print(f"Anthropic API error: {e}")
+            if _is_transient(e):
+                raise
+            logger.error("Anthropic API error: %s", e)
+            return self._generate_mock_content("Error", "Anthropic API call failed")
+
+    def _stream_openai(self, prompt: str, model_key: str, cache_scope: Tuple[str, str]) -> Iterator[str]:
+        """Stream content from the OpenAI API"""
+        parts = []
+        try:
+            client = self._openai_client()
+            model_name = self.model_config[model_key]["model_name"]
+
+            cache_key, cached = self._lookup_cached(model_name, SYSTEM_PROMPT, prompt, cache_scope)
+            if cached is not None:
+                yield cached
+                return
+
+            stream = client.chat.completions.create(
+                model=model_name,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=self.temperature,
+                max_tokens=MAX_OUTPUT_TOKENS,
+                stream=True
+            )
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield delta
+
+            self._store_cached(cache_key, model_name, prompt, cache_scope, "".join(parts).strip())
+
+        except Exception as e:
+            if _is_transient(e):
+                raise
+            logger.error("OpenAI API error: %s", e)
+            # Only substitute placeholder content if nothing was shown yet
+            if not parts:
+                yield self._generate_mock_content("Error", "OpenAI API call failed")
+
+    def _stream_anthropic(self, prompt: str, cache_scope: Tuple[str, str]) -> Iterator[str]:
+        """Stream content from the Anthropic Claude API"""
+        parts = []
+        try:
+            client = self._anthropic_client()
+            model_name = self.model_config["claude"]["model_name"]
+
+            cache_key, cached = self._lookup_cached(model_name, SYSTEM_PROMPT, prompt, cache_scope)
+            if cached is not None:
+                yield cached
+                return
+
+            with client.messages.stream(
+                model=model_name,
+                max_tokens=MAX_OUTPUT_TOKENS,
+                temperature=self.temperature,
+                system=ANTHROPIC_SYSTEM,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            ) as stream:
+                for text in stream.text_stream:
+                    parts.append(text)
+                    yield text
+
+            self._store_cached(cache_key, model_name, prompt, cache_scope, "".join(parts).strip())
+
+        except Exception as e:
+            if _is_transient(e):
+                raise
+            logger.error("Anthropic API error: %s", e)
+            if not parts:
+                yield self._generate_mock_content("Error", "Anthropic API call failed")
+
+    async def _throttle(self, model_key: str, prompt: str, max_tokens: int) -> None:
+        """Reserve rate-limit budget for a request before sending it"""
+        limiter = self.rate_limiters.get(model_key)
+        if limiter is None:
+            return
+        # Rough estimate (~4 characters per token) plus the output allowance,
+        # which providers count against the per-minute token limit
+        await limiter.acquire(len(prompt) // 4 + max_tokens)
+
+    def _reset_async_clients_for_loop(self):
+        """Drop async clients created on a different (possibly closed) event loop"""
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            self._async_loop = loop
+            self._async_openai = None
+            self._async_anthropic = None
+
+    async def _agenerate_openai(self, prompt: str, model_key: str, cache_scope: Tuple[str, str] = ("", "")) -> str:
+        """Generate content using the async OpenAI client"""
+        try:
+            client = self._async_openai_client()
+            model_name = self.model_config[model_key]["model_name"]
+
+            cache_key, cached = await self._alookup_cached(model_name, SYSTEM_PROMPT, prompt, cache_scope)
+            if cached is not None:
+                return cached
+
+            await self._throttle(model_key, prompt, MAX_OUTPUT_TOKENS)
+            response = await client.chat.completions.create(
+                model=model_name,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=self.temperature,
+                max_tokens=MAX_OUTPUT_TOKENS
+            )
+
+            content = response.choices[0].message.content.strip()
+            self._store_cached(cache_key, model_name, prompt, cache_scope, content)
+            return content
+
+        except Exception as e:
+            if _is_transient(e):
+                raise
+            logger.error("OpenAI API error: %s", e)
+            return self._generate_mock_content("Error", "OpenAI API call failed")
+
+    async def _agenerate_anthropic(self, prompt: str, cache_scope: Tuple[str, str] = ("", "")) -> str:
+        """Generate content using the async Anthropic client"""
+        try:
+            client = self._async_anthropic_client()
+            model_name = self.model_config["claude"]["model_name"]
+
+            cache_key, cached = await self._alookup_cached(model_name, SYSTEM_PROMPT, prompt, cache_scope)
+            if cached is not None:
+                return cached
+
+            await self._throttle("claude", prompt, MAX_OUTPUT_TOKENS)
+            response = await client.messages.create(
+                model=model_name,
+                max_tokens=MAX_OUTPUT_TOKENS,
+                temperature=self.temperature,
+                system=ANTHROPIC_SYSTEM,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            )
+
+            content = response.content[0].text.strip()
+            self._store_cached(cache_key, model_name, prompt, cache_scope, content)
+            return content
+
+        except Exception as e:
+            if _is_transient(e):
+                raise
+            logger.error("Anthropic API error: %s", e)
             return self._generate_mock_content("Error", "Anthropic API call failed")
 
     def _generate_mock_content(self, section_title: str, doc_title: str) -> str:
         """Generate mock content for testing without API keys"""
+        template = _MOCK_TEMPLATES.get(section_title)
+        if template is None:
+            return _MOCK_GENERIC.format(section_title=section_title, doc_title=doc_title)
+        return template.format(doc_title_lower=doc_title.lower())
 
-        mock_content = {
-            "Purpose": f"""This Standard Operating Procedure (SOP) establishes the standardized methodology for {doc_title.lower()}.
+
+# Demo-mode section content, formatted with the document title on use
+_MOCK_TEMPLATES = {
+    "Purpose": """This Standard Operating Procedure (SOP) establishes the standardized methodology for {doc_title_lower}.
 
 The purpose of this procedure is to ensure consistent, reproducible, and compliant execution of the specified operations. This SOP provides clear guidance to personnel performing these activities and ensures adherence to applicable standards and regulatory requirements.""",
 
-            "Scope": f"""This procedure applies to all operations related to {doc_title.lower()} within the organization.
+    "Scope": """This procedure applies to all operations related to {doc_title_lower} within the organization.
 
 **Included:**
 - All testing and qualification activities as specified
@@ -379,7 +1070,7 @@ The purpose of this procedure is to ensure consistent, reproducible, and complia
 - Emergency or non-standard procedures (covered by separate SOPs)
 - Research and development activities outside standard operations""",
 
-            "Definitions and Abbreviations": """**Definitions:**
+    "Definitions and Abbreviations": """**Definitions:**
 - **SOP**: Standard Operating Procedure - A documented procedure describing how to perform specific operations
 - **QA**: Quality Assurance - Systematic activities ensuring quality requirements are fulfilled
 - **Calibration**: Process of checking and adjusting the accuracy of measuring equipment
@@ -390,7 +1081,7 @@ The purpose of this procedure is to ensure consistent, reproducible, and complia
 - QC: Quality Control
 - STC: Standard Test Conditions""",
 
-            "Responsibilities": """**Test Operator:**
+    "Responsibilities": """**Test Operator:**
 - Execute the test procedure as documented
 - Record all observations and measurements
 - Report any deviations or anomalies
@@ -408,7 +1099,7 @@ The purpose of this procedure is to ensure consistent, reproducible, and complia
 - Review and approve SOP revisions
 - Audit procedure compliance""",
 
-            "Normative References": """The following standards and documents are referenced in this procedure:
+    "Normative References": """The following standards and documents are referenced in this procedure:
 
 1. ISO/IEC 17025 - General requirements for the competence of testing and calibration laboratories
 2. Relevant industry-specific standards (IEC, ASTM, etc.)
@@ -416,7 +1107,7 @@ The purpose of this procedure is to ensure consistent, reproducible, and complia
 4. Equipment manufacturer's operating manuals
 5. Applicable regulatory requirements and guidelines""",
 
-            "HSE Risk Assessment": """**Hazard Identification and Risk Assessment:**
+    "HSE Risk Assessment": """**Hazard Identification and Risk Assessment:**
 
 | Hazard | Risk Level | Control Measures |
 |--------|-----------|------------------|
@@ -436,7 +1127,7 @@ The purpose of this procedure is to ensure consistent, reproducible, and complia
 - First aid kit available at [specify location]
 - Emergency contact numbers posted""",
 
-            "Equipment and Materials": """**Equipment Required:**
+    "Equipment and Materials": """**Equipment Required:**
 1. [Primary test equipment] - Model/Specification
 2. [Measurement instruments] - Calibration due date must be current
 3. [Data acquisition system] - Software version
@@ -453,7 +1144,7 @@ The purpose of this procedure is to ensure consistent, reproducible, and complia
 - Calibration interval: As specified in equipment database
 - Calibration records maintained in quality system""",
 
-            "Test Procedure": """**Pre-Test Setup:**
+    "Test Procedure": """**Pre-Test Setup:**
 1. Verify all equipment is calibrated and functioning properly
 2. Prepare test samples according to specifications
 3. Record environmental conditions (temperature, humidity)
@@ -480,7 +1171,7 @@ The purpose of this procedure is to ensure consistent, reproducible, and complia
 9. Complete all documentation
 10. File test records according to procedure""",
 
-            "Procedure": """1. Review all relevant documentation and ensure understanding of requirements
+    "Procedure": """1. Review all relevant documentation and ensure understanding of requirements
 
 2. Gather all necessary equipment and materials
 
@@ -502,7 +1193,7 @@ The purpose of this procedure is to ensure consistent, reproducible, and complia
 
 8. Submit records to appropriate personnel for review""",
 
-            "Data Analysis and Requirements": """**Data Collection:**
+    "Data Analysis and Requirements": """**Data Collection:**
 - All measurements must be recorded in real-time
 - Use calibrated instruments only
 - Record to appropriate significant figures
@@ -527,7 +1218,7 @@ The purpose of this procedure is to ensure consistent, reproducible, and complia
 - Ensure traceability of all measurements
 - Maintain data integrity and security""",
 
-            "Pass/Fail Criteria": """**Acceptance Criteria:**
+    "Pass/Fail Criteria": """**Acceptance Criteria:**
 
 The test sample is considered PASS if all of the following criteria are met:
 
@@ -553,7 +1244,7 @@ The test sample is considered PASS if all of the following criteria are met:
 - FAIL results: Issue non-conformance report
 - Marginal results: Require engineering review""",
 
-            "Safety Considerations": """**General Safety:**
+    "Safety Considerations": """**General Safety:**
 - All personnel must be trained on this procedure before execution
 - Wear required PPE at all times
 - Follow lockout/tagout procedures for equipment maintenance
@@ -573,12 +1264,10 @@ The test sample is considered PASS if all of the following criteria are met:
 - Dispose of waste materials according to regulations
 - Minimize environmental impact
 - Use sustainable practices where possible"""
-        }
+}
 
-        # Return specific content or generic
-        return mock_content.get(
-            section_title,
-            f"""[AI-Generated Mock Content for {section_title}]
+# Demo-mode content for sections without a template above
+_MOCK_GENERIC = """[AI-Generated Mock Content for {section_title}]
 
 This section would contain detailed content specific to {section_title} for the SOP titled "{doc_title}".
 
@@ -590,4 +1279,3 @@ In production mode with API keys configured, this content would be generated by
 3. The system will automatically use real AI models when keys are detected
 
 **Current Status:** Running in demo/mock mode for testing purposes."""
-        )
@@ -3,14 +3,51 @@ Data Models for SOP-gen
 Defines Document, Section, and Version classes
 """
 
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, asdict, replace
 from datetime import datetime
 from typing import List, Optional, Dict, Any
+import bisect
+import copy
 import json
 import os
+import sys
 
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used when missing
+    orjson = None
 
-@dataclass
+# __slots__ cut per-instance memory (version histories hold many Sections);
+# dataclass(slots=True) needs Python 3.10+
+_DATACLASS_OPTIONS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+def _dumps_json(data: dict, pretty: bool = True) -> bytes:
+    """UTF-8 JSON, indented or compact, via orjson when it is installed"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else None)
+        except TypeError:
+            # orjson rejects some values json accepts (e.g. non-str keys)
+            pass
+    if pretty:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _loads_json(raw: bytes) -> Any:
+    """Parse UTF-8 JSON bytes, via orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode('utf-8'))
+
+
+def _snapshot_index(snapshot: List['Section']) -> Dict[str, 'Section']:
+    """Map titles to sections of a version snapshot"""
+    return {sec.title: sec for sec in snapshot}
+
+
+@dataclass(**_DATACLASS_OPTIONS)
 class Section:
     """Represents a section of an SOP document."""
     title: str                   # e.g. "Purpose", "Scope", "Responsibilities"
@@ -21,6 +58,12 @@ class Section:
     order: int = 0              # Section order in document
     metadata: Dict[str, Any] = field(default_factory=dict)  # Additional metadata
 
+    def __post_init__(self):
+        # Interned so exporter handler lookups on content_type hit the
+        # identity fast path, including for sections loaded from JSON
+        if isinstance(self.content_type, str):
+            self.content_type = sys.intern(self.content_type)
+
     def to_dict(self) -> dict:
         """Convert section to dictionary"""
         return asdict(self)
@@ -31,7 +74,7 @@ class Section:
         return cls(**data)
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class DocumentVersion:
     """Keeps track of a version of the document for audit trail."""
     version_id: int
@@ -60,7 +103,7 @@ class DocumentVersion:
         return cls(**data)
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class Document:
     """Encapsulates an SOP document with multiple sections and version history."""
     title: str
@@ -74,22 +117,51 @@ class Document:
     approver: Optional[str] = None
     metadata: Dict[str, Any] = field(default_factory=dict)  # Company, division, etc.
     template_name: str = ""
+    # First section for each title; rebuilt when found stale (see get_section)
+    _by_title: Dict[str, Section] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _indexed_sections: Optional[List[Section]] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._reindex_sections()
+
+    def _reindex_sections(self) -> None:
+        """Rebuild the title -> section index"""
+        self._by_title = {}
+        for sec in self.sections:
+            self._by_title.setdefault(sec.title, sec)
+        self._indexed_sections = self.sections
 
     def add_section(self, title: str, content: str = "", content_type: str = "text", order: int = None) -> None:
         """Add a new section to the document."""
         if order is None:
             order = len(self.sections)
-        self.sections.append(Section(title=title, content=content, content_type=content_type, order=order))
-        self.sections.sort(key=lambda x: x.order)
+        section = Section(title=title, content=content, content_type=content_type, order=order)
+
+        # sections is kept sorted by order, so a section belonging at the end
+        # (the usual case) is appended and any other is inserted in place
+        if not self.sections or order >= self.sections[-1].order:
+            self.sections.append(section)
+            self._by_title.setdefault(title, section)
+        else:
+            index = bisect.bisect_right([sec.order for sec in self.sections], order)
+            self.sections.insert(index, section)
+            self._reindex_sections()
 
     def remove_section(self, title: str) -> None:
         """Remove a section by title."""
         self.sections = [sec for sec in self.sections if sec.title != title]
         self._reorder_sections()
+        self._reindex_sections()
 
     def get_section(self, title: str) -> Optional[Section]:
         """Retrieve a section by title."""
-        return next((sec for sec in self.sections if sec.title == title), None)
+        section = self._by_title.get(title)
+        # Sections can be renamed in place or the list replaced outright,
+        # so a miss or mismatch rescans before giving up
+        if section is None or section.title != title or self._indexed_sections is not self.sections:
+            self._reindex_sections()
+            section = self._by_title.get(title)
+        return section
 
     def update_section(self, title: str, content: str, ai_generated: bool = False) -> bool:
         """Update section content"""
@@ -101,10 +173,25 @@ class Document:
             return True
         return False
 
+    def filled_section_count(self) -> int:
+        """Count sections with non-blank content (no per-section copies)"""
+        return sum(1 for sec in self.sections if sec.content and not sec.content.isspace())
+
     def log_version(self, user: str, role: str, changes: str) -> None:
         """Log the current state as a new version."""
         version_id = len(self.versions) + 1
-        snapshot = [Section(**asdict(sec)) for sec in self.sections]
+        previous = _snapshot_index(self.versions[-1].content_snapshot) if self.versions else {}
+        snapshot = []
+        for sec in self.sections:
+            # Unchanged sections share the previous version's copy, so each
+            # version only costs memory for what actually changed
+            prev = previous.get(sec.title)
+            if prev is not None and prev == sec:
+                snapshot.append(prev)
+            else:
+                # Strings are immutable, so sections are copied shallowly;
+                # only the metadata dict needs its own copy
+                snapshot.append(replace(sec, metadata=copy.deepcopy(sec.metadata) if sec.metadata else {}))
         self.versions.append(
             DocumentVersion(version_id, datetime.now(), user, role, changes, snapshot)
         )
@@ -146,22 +233,48 @@ class Document:
         data['last_modified'] = datetime.fromisoformat(data['last_modified'])
         data['sections'] = [Section.from_dict(sec) for sec in data['sections']]
         data['versions'] = [DocumentVersion.from_dict(ver) for ver in data['versions']]
+
+        # Files store every snapshot in full; share identical sections again
+        previous = {}
+        for ver in data['versions']:
+            ver.content_snapshot = [
+                previous[sec.title] if previous.get(sec.title) == sec else sec
+                for sec in ver.content_snapshot
+            ]
+            previous = _snapshot_index(ver.content_snapshot)
         return cls(**data)
 
-    def save(self, directory: str = "data/documents") -> str:
-        """Save document to JSON file"""
+    def save(self, directory: str = "data/documents", compress: bool = False) -> str:
+        """
+        Save document to JSON file
+
+        Args:
+            directory: Target directory
+            compress: Write zstandard-compressed .json.zst (requires the
+                zstandard package); version snapshots repeat most of the
+                text, so histories compress well
+        """
         os.makedirs(directory, exist_ok=True)
-        filename = f"{self.doc_number or 'doc'}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        extension = '.json.zst' if compress else '.json'
+        filename = f"{self.doc_number or 'doc'}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{extension}"
         filepath = os.path.join(directory, filename)
 
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        data = _dumps_json(self.to_dict())
+        if compress:
+            import zstandard
+            data = zstandard.ZstdCompressor(level=3, threads=-1).compress(data)
+
+        with open(filepath, 'wb') as f:
+            f.write(data)
 
         return filepath
 
     @classmethod
     def load(cls, filepath: str) -> 'Document':
-        """Load document from JSON file"""
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return cls.from_dict(data)
+        """Load document from JSON file (.json or zstandard-compressed .json.zst)"""
+        with open(filepath, 'rb') as f:
+            raw = f.read()
+        if filepath.endswith('.zst'):
+            import zstandard
+            raw = zstandard.ZstdDecompressor().decompress(raw)
+        return cls.from_dict(_loads_json(raw))
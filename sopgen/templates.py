@@ -3,11 +3,12 @@ Template Library Management
 Handles predefined templates and custom template imports
 """
 
-import json
+import copy
 import os
-from typing import Dict, List, Optional
+import threading
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
-from .models import Document, Section
+from .models import Document, Section, _dumps_json, _loads_json
 
 
 class TemplateManager:
@@ -16,6 +17,9 @@ class TemplateManager:
     def __init__(self, templates_dir: str = "templates"):
         self.templates_dir = templates_dir
         self._ensure_templates_dir()
+        # Keyed on st_mtime_ns, so edits and new files are picked up on the next call
+        self._list_cache: Optional[Tuple[int, List[str]]] = None
+        self._raw_cache: Dict[str, Tuple[int, dict]] = {}
 
     def _ensure_templates_dir(self):
         """Ensure templates directory exists"""
@@ -23,30 +27,60 @@ class TemplateManager:
 
     def list_templates(self) -> List[str]:
         """Return list of available template names"""
-        templates = []
-        if os.path.exists(self.templates_dir):
-            for file in os.listdir(self.templates_dir):
-                if file.endswith('.json'):
-                    templates.append(file.replace('.json', ''))
-        return sorted(templates)
+        try:
+            mtime = os.stat(self.templates_dir).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        if self._list_cache is not None and self._list_cache[0] == mtime:
+            return list(self._list_cache[1])
+
+        # DirEntry.is_file() uses the file type from the directory read itself
+        with os.scandir(self.templates_dir) as entries:
+            templates = sorted(
+                entry.name[:-len('.json')] for entry in entries
+                if entry.name.endswith('.json') and entry.is_file()
+            )
+        self._list_cache = (mtime, templates)
+        return list(templates)
 
-    def load_template(self, template_name: str) -> Document:
-        """Load a predefined template by name and return a Document"""
+    def _get_raw(self, template_name: str) -> Optional[dict]:
+        """
+        Parsed template JSON, re-read only when the file changes
+
+        The returned dict is shared by later calls and must not be modified.
+        """
         template_path = os.path.join(self.templates_dir, f"{template_name}.json")
 
-        if not os.path.exists(template_path):
-            raise ValueError(f"Template '{template_name}' not found at {template_path}")
+        try:
+            mtime = os.stat(template_path).st_mtime_ns
+        except FileNotFoundError:
+            self._raw_cache.pop(template_name, None)
+            return None
 
-        with open(template_path, 'r', encoding='utf-8') as f:
-            template_data = json.load(f)
+        cached = self._raw_cache.get(template_name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
 
-        # Create document from template
+        with open(template_path, 'rb') as f:
+            template_data = _loads_json(f.read())
+        self._raw_cache[template_name] = (mtime, template_data)
+        return template_data
+
+    def load_template(self, template_name: str) -> Document:
+        """Load a predefined template by name and return a Document"""
+        template_data = self._get_raw(template_name)
+        if template_data is None:
+            template_path = os.path.join(self.templates_dir, f"{template_name}.json")
+            raise ValueError(f"Template '{template_name}' not found at {template_path}")
+
+        # Create document from template (metadata is copied so edits to the
+        # document don't reach the cached template data)
         doc = Document(
             title=template_data.get('title', f'{template_name} SOP'),
             doc_number=template_data.get('doc_number', ''),
             created_by='template_system',
             template_name=template_name,
-            metadata=template_data.get('metadata', {})
+            metadata=copy.deepcopy(template_data.get('metadata', {}))
         )
 
         # Add sections from template
@@ -60,12 +94,40 @@ class TemplateManager:
 
         return doc
 
-    def save_template(self, template_name: str, template_data: dict) -> str:
-        """Save a template to the library"""
+    def save_template(
+        self,
+        template_name: str,
+        template_data: dict,
+        pretty: bool = False,
+        durable: bool = False
+    ) -> str:
+        """
+        Save a template to the library
+
+        The file is written under a temporary name and renamed into place,
+        so readers never see a half-written template.
+
+        Args:
+            template_name: File name without the .json extension
+            template_data: Template content
+            pretty: Indent the JSON for hand editing (compact by default)
+            durable: fsync before the rename so the file survives a crash
+        """
         template_path = os.path.join(self.templates_dir, f"{template_name}.json")
-
-        with open(template_path, 'w', encoding='utf-8') as f:
-            json.dump(template_data, f, indent=2, ensure_ascii=False)
+        # Unique per writer, so concurrent saves don't share a temp file
+        tmp_path = f"{template_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(_dumps_json(template_data, pretty=pretty))
+                if durable:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, template_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
 
         return template_path
 
@@ -90,14 +152,10 @@ class TemplateManager:
 
     def get_template_info(self, template_name: str) -> Optional[dict]:
         """Get template metadata and section list"""
-        template_path = os.path.join(self.templates_dir, f"{template_name}.json")
-
-        if not os.path.exists(template_path):
+        template_data = self._get_raw(template_name)
+        if template_data is None:
             return None
 
-        with open(template_path, 'r', encoding='utf-8') as f:
-            template_data = json.load(f)
-
         return {
             'name': template_name,
             'title': template_data.get('title', ''),
@@ -108,87 +166,107 @@ class TemplateManager:
         }
 
 
+# Standards database, built once at import and shared by every StandardsManager
+_STANDARDS_DB: Dict[str, dict] = {
+    # IEC Standards (PV Testing)
+    "IEC 61215": {
+        "full_name": "IEC 61215: Terrestrial photovoltaic (PV) modules - Design qualification and type approval",
+        "category": "Solar PV",
+        "organization": "IEC",
+        "description": "Design qualification and type approval for crystalline silicon PV modules"
+    },
+    "IEC 61730": {
+        "full_name": "IEC 61730: Photovoltaic (PV) module safety qualification",
+        "category": "Solar PV",
+        "organization": "IEC",
+        "description": "Safety qualification requirements for PV modules"
+    },
+    "IEC 61853": {
+        "full_name": "IEC 61853: Photovoltaic (PV) module performance testing and energy rating",
+        "category": "Solar PV",
+        "organization": "IEC",
+        "description": "PV module performance testing procedures and energy rating methodologies"
+    },
+    "IEC 62804": {
+        "full_name": "IEC 62804: Test methods for the detection of potential-induced degradation of crystalline silicon PV modules",
+        "category": "Solar PV",
+        "organization": "IEC",
+        "description": "Methods for detecting potential-induced degradation (PID) in PV modules"
+    },
+
+    # ISO Standards (Quality & Management)
+    "ISO 9001": {
+        "full_name": "ISO 9001: Quality management systems - Requirements",
+        "category": "Quality Management",
+        "organization": "ISO",
+        "description": "Requirements for quality management systems"
+    },
+    "ISO 14001": {
+        "full_name": "ISO 14001: Environmental management systems - Requirements with guidance for use",
+        "category": "Environmental Management",
+        "organization": "ISO",
+        "description": "Environmental management system requirements"
+    },
+    "ISO 45001": {
+        "full_name": "ISO 45001: Occupational health and safety management systems - Requirements with guidance for use",
+        "category": "Health & Safety",
+        "organization": "ISO",
+        "description": "Occupational health and safety management requirements"
+    },
+    "ISO 27001": {
+        "full_name": "ISO 27001: Information security management systems - Requirements",
+        "category": "Information Security",
+        "organization": "ISO",
+        "description": "Information security management system requirements"
+    },
+    "ISO 17025": {
+        "full_name": "ISO/IEC 17025: General requirements for the competence of testing and calibration laboratories",
+        "category": "Laboratory Testing",
+        "organization": "ISO",
+        "description": "Requirements for competence of testing and calibration laboratories"
+    },
+
+    # ASTM Standards
+    "ASTM E1036": {
+        "full_name": "ASTM E1036: Standard Test Methods for Electrical Performance of Nonconcentrator Terrestrial Photovoltaic Modules and Arrays Using Reference Cells",
+        "category": "Solar PV",
+        "organization": "ASTM",
+        "description": "Test methods for PV module electrical performance"
+    },
+    "ASTM D7866": {
+        "full_name": "ASTM D7866: Standard Test Method for Determining the Biobased Content of Solid, Liquid, and Gaseous Samples Using Radiocarbon Analysis",
+        "category": "Materials Testing",
+        "organization": "ASTM",
+        "description": "Radiocarbon analysis for biobased content"
+    }
+}
+
+
+def _build_search_index(standards_db: Dict[str, dict]) -> Dict[str, str]:
+    """Lowercased id/name/category per standard; \x00 keeps a query from matching across two fields"""
+    return {
+        std_id: "\x00".join((std_id, std['full_name'], std['category'])).lower()
+        for std_id, std in standards_db.items()
+    }
+
+
+_SEARCH_INDEX = _build_search_index(_STANDARDS_DB)
+
+
 class StandardsManager:
     """Manages standards database and references"""
 
     def __init__(self):
         self.standards_db = self._initialize_standards()
+        # Lowercased once instead of on every search
+        self._search_index = (
+            _SEARCH_INDEX if self.standards_db is _STANDARDS_DB
+            else _build_search_index(self.standards_db)
+        )
 
     def _initialize_standards(self) -> Dict[str, dict]:
-        """Initialize standards database"""
-        return {
-            # IEC Standards (PV Testing)
-            "IEC 61215": {
-                "full_name": "IEC 61215: Terrestrial photovoltaic (PV) modules - Design qualification and type approval",
-                "category": "Solar PV",
-                "organization": "IEC",
-                "description": "Design qualification and type approval for crystalline silicon PV modules"
-            },
-            "IEC 61730": {
-                "full_name": "IEC 61730: Photovoltaic (PV) module safety qualification",
-                "category": "Solar PV",
-                "organization": "IEC",
-                "description": "Safety qualification requirements for PV modules"
-            },
-            "IEC 61853": {
-                "full_name": "IEC 61853: Photovoltaic (PV) module performance testing and energy rating",
-                "category": "Solar PV",
-                "organization": "IEC",
-                "description": "PV module performance testing procedures and energy rating methodologies"
-            },
-            "IEC 62804": {
-                "full_name": "IEC 62804: Test methods for the detection of potential-induced degradation of crystalline silicon PV modules",
-                "category": "Solar PV",
-                "organization": "IEC",
-                "description": "Methods for detecting potential-induced degradation (PID) in PV modules"
-            },
-
-            # ISO Standards (Quality & Management)
-            "ISO 9001": {
-                "full_name": "ISO 9001: Quality management systems - Requirements",
-                "category": "Quality Management",
-                "organization": "ISO",
-                "description": "Requirements for quality management systems"
-            },
-            "ISO 14001": {
-                "full_name": "ISO 14001: Environmental management systems - Requirements with guidance for use",
-                "category": "Environmental Management",
-                "organization": "ISO",
-                "description": "Environmental management system requirements"
-            },
-            "ISO 45001": {
-                "full_name": "ISO 45001: Occupational health and safety management systems - Requirements with guidance for use",
-                "category": "Health & Safety",
-                "organization": "ISO",
-                "description": "Occupational health and safety management requirements"
-            },
-            "ISO 27001": {
-                "full_name": "ISO 27001: Information security management systems - Requirements",
-                "category": "Information Security",
-                "organization": "ISO",
-                "description": "Information security management system requirements"
-            },
-            "ISO 17025": {
-                "full_name": "ISO/IEC 17025: General requirements for the competence of testing and calibration laboratories",
-                "category": "Laboratory Testing",
-                "organization": "ISO",
-                "description": "Requirements for competence of testing and calibration laboratories"
-            },
-
-            # ASTM Standards
-            "ASTM E1036": {
-                "full_name": "ASTM E1036: Standard Test Methods for Electrical Performance of Nonconcentrator Terrestrial Photovoltaic Modules and Arrays Using Reference Cells",
-                "category": "Solar PV",
-                "organization": "ASTM",
-                "description": "Test methods for PV module electrical performance"
-            },
-            "ASTM D7866": {
-                "full_name": "ASTM D7866: Standard Test Method for Determining the Biobased Content of Solid, Liquid, and Gaseous Samples Using Radiocarbon Analysis",
-                "category": "Materials Testing",
-                "organization": "ASTM",
-                "description": "Radiocarbon analysis for biobased content"
-            }
-        }
+        """Initialize standards database (shared by all instances; treat as read-only)"""
+        return _STANDARDS_DB
 
     def get_all_standards(self) -> Dict[str, dict]:
         """Return all standards"""
@@ -201,13 +279,11 @@ class StandardsManager:
     def search_standards(self, query: str) -> Dict[str, dict]:
         """Search standards by keyword"""
         query = query.lower()
-        results = {}
-        for std_id, std_data in self.standards_db.items():
-            if (query in std_id.lower() or
-                query in std_data['full_name'].lower() or
-                query in std_data['category'].lower()):
-                results[std_id] = std_data
-        return results
+        return {
+            std_id: self.standards_db[std_id]
+            for std_id, haystack in self._search_index.items()
+            if query in haystack
+        }
 
     def get_citation(self, standard_id: str) -> str:
         """Get formatted citation for a standard"""
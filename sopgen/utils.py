@@ -18,7 +18,11 @@ def get_saved_documents(directory: str = "data/documents") -> List[str]:
     if not os.path.exists(directory):
         return []
 
-    files = [f for f in os.listdir(directory) if f.endswith('.json')]
+    with os.scandir(directory) as entries:
+        files = [
+            entry.name for entry in entries
+            if entry.name.endswith(('.json', '.json.zst')) and entry.is_file()
+        ]
     return sorted(files, reverse=True)  # Most recent first
 
 
@@ -27,13 +31,13 @@ def format_timestamp(dt: datetime) -> str:
     return dt.strftime('%Y-%m-%d %H:%M:%S')
 
 
+# Characters not allowed in file names, each replaced with '_'
+_SANITIZE_TABLE = str.maketrans(dict.fromkeys('<>:"/\\|?*', '_'))
+
+
 def sanitize_filename(filename: str) -> str:
     """Sanitize filename for safe file system use"""
-    # Remove or replace invalid characters
-    invalid_chars = '<>:"/\\|?*'
-    for char in invalid_chars:
-        filename = filename.replace(char, '_')
-    return filename.strip()
+    return filename.translate(_SANITIZE_TABLE).strip()
 
 
 def get_file_size_mb(file_bytes: bytes) -> float:
@@ -83,6 +83,41 @@ def test_export():
         print(f"  ❌ Export error: {e}")
         return False
 
+def test_gen_cache():
+    """Test GenCache title slotting"""
+    print("\n🗃️  Testing generation cache...")
+    try:
+        from sopgen.cache import GenCache
+
+        cache = GenCache()
+        response = "Run the latest-tested Test build. Solar inverters are out of scope."
+
+        # Single-word titles occur as ordinary words, so they are never stored
+        for title in ("Test", "Solar"):
+            cache.set("model", "Scope", f"Write the scope for {title}", title, response)
+            if cache.get("model", "Scope", "Write the scope for Battery Storage Commissioning",
+                         "Battery Storage Commissioning") is not None:
+                print(f"  ❌ Skeleton stored for single-word title '{title}'")
+                return False
+
+        # Multi-word titles are only slotted as whole words
+        title = "Wind Turbine Inspection"
+        cache.set("model", "Scope", f"Write the scope for {title}", title,
+                  f"This {title} SOP covers each wind turbine inspection. Wind Turbine Inspectionsheet excluded.")
+        filled = cache.get("model", "Scope", "Write the scope for Battery Storage Commissioning",
+                           "Battery Storage Commissioning")
+        expected = ("This Battery Storage Commissioning SOP covers each battery storage commissioning. "
+                    "Wind Turbine Inspectionsheet excluded.")
+        if filled != expected:
+            print(f"  ❌ Unexpected skeleton fill: {filled!r}")
+            return False
+
+        print("  ✅ Titles slotted on word boundaries; single-word titles skipped")
+        return True
+    except Exception as e:
+        print(f"  ❌ Generation cache error: {e}")
+        return False
+
 def check_streamlit():
     """Check if Streamlit is installed"""
     print("\n🎨 Checking Streamlit...")
@@ -107,6 +142,7 @@ def main():
     results.append(("Document Creation", test_document_creation()))
     results.append(("AI Generator", test_ai_generator()))
     results.append(("Export", test_export()))
+    results.append(("Generation Cache", test_gen_cache()))
     results.append(("Streamlit", check_streamlit()))
 
     print("\n" + "=" * 60)
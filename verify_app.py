@@ -6,7 +6,7 @@ Tests all components and verifies the app is ready to run
 
 import sys
 import os
-import subprocess
+import py_compile
 
 # Add project to path
 sys.path.insert(0, os.path.dirname(__file__))
@@ -81,16 +81,12 @@ def test_components():
 def test_app_syntax():
     """Test app.py syntax"""
     print("Testing app.py syntax...")
-    result = subprocess.run(
-        ['python3', '-m', 'py_compile', 'app.py'],
-        capture_output=True,
-        text=True
-    )
-    if result.returncode == 0:
+    try:
+        py_compile.compile('app.py', doraise=True)
         print("  ✓ app.py syntax valid")
         return True
-    else:
-        print(f"  ✗ Syntax error: {result.stderr}")
+    except py_compile.PyCompileError as e:
+        print(f"  ✗ Syntax error: {e.msg}")
         return False
 
 def main():